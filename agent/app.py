@@ -1,38 +1,70 @@
 import os
+import atexit
 import sys
-import json
+import base64
+import collections
 import logging
+import logging.handlers
 import time
 import hashlib
+import hmac
+import queue
 import subprocess
 import signal
+import shutil
+import tempfile
+import select
+import socket
+import struct
 import threading
+import types
+import urllib.parse
 from datetime import datetime, timedelta
 from functools import wraps
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from pathlib import Path
 import secrets
 
 import flask
 from flask import Flask, request, jsonify, g
+from flask.json.provider import DefaultJSONProvider
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from limits import parse as parse_rate_limit
 from flask_cors import CORS
 from flask_talisman import Talisman
+import cachetools
 import jwt
+import orjson
+import xxhash
 from werkzeug.security import check_password_hash, generate_password_hash
 import redis
 from prometheus_client import Counter, Histogram, Gauge, generate_latest
 import psutil
 
 # Configure structured logging
+# Request threads only enqueue records; a listener thread does the file and
+# stdout writes, so a slow disk never stalls request handling.
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s - %(pathname)s:%(lineno)d')
+_log_handlers = [
+    logging.FileHandler('/app/logs/agent.log'),
+    logging.StreamHandler(sys.stdout)
+]
+for _log_handler in _log_handlers:
+    _log_handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# The queue handler only merges args (and any traceback) into the message;
+# the listener's handlers apply the full format
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s - %(pathname)s:%(lineno)d',
-    handlers=[
-        logging.FileHandler('/app/logs/agent.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+    handlers=[_queue_handler]
 )
 logger = logging.getLogger(__name__)
 
@@ -43,23 +75,236 @@ ACTIVE_CONNECTIONS = Gauge('agent_active_connections', 'Active connections')
 SYSTEM_MEMORY = Gauge('agent_system_memory_percent', 'System memory usage')
 SYSTEM_CPU = Gauge('agent_system_cpu_percent', 'System CPU usage')
 
+class _MetricBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = threading.current_thread()
+        self.counts = collections.Counter()
+        self.durations = []
+        self.active = 0
+
+class BufferedMetrics:
+    """Per-thread buffers for request metrics, folded into the shared collectors.
+    
+    Request threads only touch their own (uncontended) buffer; a background
+    thread and every /metrics scrape flush all buffers into the
+    prometheus_client collectors, so their locks stay off the request path.
+    """
+    
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._local = threading.local()
+        self._buffers: List[_MetricBuffer] = []
+        self._lock = threading.Lock()
+        # Labelled REQUEST_COUNT children, resolved once per label set
+        self._counters: Dict[Tuple[str, str, int], Any] = {}
+    
+    def _buffer(self) -> _MetricBuffer:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = _MetricBuffer()
+            with self._lock:
+                self._buffers.append(buffer)
+        return buffer
+    
+    def request_started(self):
+        buffer = self._buffer()
+        with buffer.lock:
+            buffer.active += 1
+    
+    def request_finished(self, method: str, endpoint: str, status: int, duration: float):
+        buffer = self._buffer()
+        with buffer.lock:
+            buffer.active -= 1
+            buffer.counts[(method, endpoint, status)] += 1
+            buffer.durations.append(duration)
+    
+    def flush(self):
+        """Move everything buffered so far into the Prometheus collectors."""
+        with self._lock:
+            buffers = list(self._buffers)
+        dead = [buffer for buffer in buffers if not buffer.thread.is_alive()]
+        
+        counts, durations, active = collections.Counter(), [], 0
+        for buffer in buffers:
+            with buffer.lock:
+                counts.update(buffer.counts)
+                durations.extend(buffer.durations)
+                active += buffer.active
+                buffer.counts.clear()
+                buffer.durations.clear()
+                buffer.active = 0
+        
+        # Buffers of finished threads are empty now and can never be written again
+        if dead:
+            with self._lock:
+                self._buffers = [buffer for buffer in self._buffers if buffer not in dead]
+        
+        for key, total in counts.items():
+            counter = self._counters.get(key)
+            if counter is None:
+                method, endpoint, status = key
+                counter = self._counters[key] = REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=status)
+            counter.inc(total)
+        for duration in durations:
+            REQUEST_DURATION.observe(duration)
+        if active:
+            ACTIVE_CONNECTIONS.inc(active)
+    
+    def start(self):
+        def run():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.warning("Metrics flush failed: %s", e)
+        
+        threading.Thread(target=run, name='metrics-flush', daemon=True).start()
+
+# Kernel and host details cannot change while the process runs
+OS_DESCRIPTION = ' '.join(os.uname())
+
+class SystemSampler:
+    """Samples host uptime, CPU, memory and disk usage on a background thread.
+    
+    Readers get the latest snapshot dict, which is replaced as a whole on
+    every sample and never mutated, so no lock is needed. CPU usage comes
+    from the non-blocking cpu_percent(interval=None): the share since the
+    previous sample.
+    """
+    
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._snapshot: Optional[Dict[str, Any]] = None
+        psutil.cpu_percent(interval=None)
+    
+    def sample(self) -> Dict[str, Any]:
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        uptime = timedelta(seconds=int(time.time() - psutil.boot_time()))
+        load = ', '.join(f'{value:.2f}' for value in os.getloadavg())
+        snapshot = {
+            'uptime': f'up {uptime}, load average: {load}',
+            'memory': {
+                'total': memory.total,
+                'available': memory.available,
+                'percent': memory.percent
+            },
+            'cpu': {
+                'count': psutil.cpu_count(),
+                'percent': psutil.cpu_percent(interval=None)
+            },
+            'disk': {
+                'total': disk.total,
+                'used': disk.used,
+                'free': disk.free,
+                'percent': disk.percent
+            }
+        }
+        SYSTEM_MEMORY.set(memory.percent)
+        SYSTEM_CPU.set(snapshot['cpu']['percent'])
+        self._snapshot = snapshot
+        return snapshot
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the latest sample, taking one now if the sampler has not run yet."""
+        return self._snapshot or self.sample()
+    
+    def start(self):
+        def run():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.sample()
+                except Exception as e:
+                    logger.warning("System sampling failed: %s", e)
+        
+        threading.Thread(target=run, name='system-sampler', daemon=True).start()
+
 # Configuration
+SECRETS_DIR = os.environ.get('SECRETS_DIR', '/app/secrets')
+
+def _load_or_create_secret(name: str) -> str:
+    """Read a secret from SECRETS_DIR, generating and storing it on first boot.
+    
+    Every worker and every restart then signs with the same key. The file is
+    published with os.link, which fails if it already exists, so concurrently
+    starting workers all end up reading the first secret written.
+    """
+    path = os.path.join(SECRETS_DIR, name)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    
+    try:
+        os.makedirs(SECRETS_DIR, mode=0o700, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=SECRETS_DIR)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(secrets.token_urlsafe(32))
+            os.link(temp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(temp_path)
+        with open(path, encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError as e:
+        logger.warning("Cannot persist %s in %s (%s); using a per-process secret", name, SECRETS_DIR, e)
+        return secrets.token_urlsafe(32)
+
 class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY', secrets.token_urlsafe(32))
-    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', secrets.token_urlsafe(32))
+    SECRET_KEY = os.environ.get('SECRET_KEY') or _load_or_create_secret('flask.key')
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or _load_or_create_secret('jwt.key')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
+    REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', '32'))
     WP_PATH = os.environ.get('WP_PATH', '/var/www/html')
     SAFE_BASE_PATH = os.path.realpath(os.environ.get('WP_PATH', '/var/www/html'))
-    AGENT_API_KEY = os.environ.get('AGENT_API_KEY', '')
+    AGENT_API_KEY = os.environ.get('AGENT_API_KEY', os.environ.get('A2A_API_KEY', ''))
     RATE_LIMIT_STORAGE_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
+    A2A_RATE_LIMIT = os.environ.get('RATE_LIMIT', '120/minute')
     MAX_FILE_SIZE = int(os.environ.get('MAX_FILE_SIZE', '10485760'))  # 10MB
-    ALLOWED_EXTENSIONS = set(os.environ.get('ALLOWED_EXTENSIONS', 'php,txt,css,js,html,json,yaml,yml').split(','))
+    ALLOWED_EXTENSIONS = frozenset(os.environ.get('ALLOWED_EXTENSIONS', 'php,txt,css,js,html,json,yaml,yml').split(','))
+    BACKUP_DIR = os.environ.get('BACKUP_DIR', '/app/backups')
     BACKUP_RETENTION_DAYS = int(os.environ.get('BACKUP_RETENTION_DAYS', '7'))
+    READ_STREAM_THRESHOLD = int(os.environ.get('READ_STREAM_THRESHOLD', '65536'))  # 64KB
+    SYSINFO_CACHE_TTL = int(os.environ.get('SYSINFO_CACHE_TTL', '300'))
+    THEME_CACHE_TTL = int(os.environ.get('THEME_CACHE_TTL', '10'))
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '10'))
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '1024'))
+    MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '20'))
+    # Let the front server send files (X-Sendfile) instead of streaming them through Python
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
     ENABLE_PROMETHEUS = os.environ.get('ENABLE_PROMETHEUS', 'true').lower() == 'true'
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+    METRICS_CACHE_TTL = float(os.environ.get('METRICS_CACHE_TTL', '5'))
+    SYSTEM_SAMPLE_INTERVAL = float(os.environ.get('SYSTEM_SAMPLE_INTERVAL', '2'))
+    WP_CLI_FPM_SOCKET = os.environ.get('WP_CLI_FPM_SOCKET', '')  # Unix socket of the WP-CLI php-fpm pool
+    WP_CLI_FPM_SCRIPT = os.environ.get('WP_CLI_FPM_SCRIPT', '/app/config/boot-fpm.php')
+    WP_CLI_FPM_POOL_SIZE = int(os.environ.get('WP_CLI_FPM_POOL_SIZE', '1'))  # Idle connections kept per worker
+    WP_CLI_BATCH_SCRIPT = os.environ.get('WP_CLI_BATCH_SCRIPT', '/app/config/wp-cli-batch.php')
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that parses request bodies and serializes jsonify() with orjson."""
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = OrjsonProvider(app)
+
+request_metrics = BufferedMetrics(Config.METRICS_FLUSH_INTERVAL)
+request_metrics.start()
+system_sampler = SystemSampler(Config.SYSTEM_SAMPLE_INTERVAL)
+system_sampler.start()
 
 # Security headers
 Talisman(app, force_https=False)  # Set to True in production with HTTPS
@@ -69,19 +314,47 @@ CORS(app, origins=os.environ.get('ALLOWED_ORIGINS', '').split(',') if os.environ
 
 # Rate limiting
 limiter = Limiter(
-    app,
-    key_func=get_remote_address,
-    storage_uri=Config.RATE_LIMIT_STORAGE_URL,
-    default_limits=["200 per day", "50 per hour"]
+    get_remote_address,
+    app=app,
+    storage_uri=Config.RATE_LIMIT_STORAGE_URL
 )
 
+# Extra per-client limits for expensive tools, checked on top of the endpoint limit
+TOOL_RATE_LIMITS = {
+    'install_wordpress_plugin': '10/minute',
+    'install_wordpress_theme': '10/minute',
+    'delete_wordpress_plugin': '20/minute',
+    'delete_wordpress_theme': '20/minute',
+    'backup_database': '5/hour',
+}
+_TOOL_RATE_LIMIT_ITEMS = {tool: parse_rate_limit(limit) for tool, limit in TOOL_RATE_LIMITS.items()}
+
+def tool_rate_limited(tool_name: str) -> bool:
+    """Consume one call of tool_name's limit for the client; True when it is exhausted."""
+    limit = _TOOL_RATE_LIMIT_ITEMS.get(tool_name)
+    if limit is None:
+        return False
+    try:
+        return not limiter.limiter.hit(limit, 'tool', tool_name, get_remote_address())
+    except Exception as e:
+        logger.warning("Tool rate limit check failed: %s", e)
+        return False
+
 # Redis client for caching
 try:
-    redis_client = redis.from_url(Config.REDIS_URL, decode_responses=True)
+    # One bounded pool per process; callers wait for a free connection
+    # instead of opening one per thread. Replies stay bytes: cached values are
+    # orjson payloads, parsed straight off the wire without a str decode.
+    redis_pool = redis.BlockingConnectionPool.from_url(
+        Config.REDIS_URL,
+        max_connections=Config.REDIS_MAX_CONNECTIONS,
+        timeout=5
+    )
+    redis_client = redis.Redis(connection_pool=redis_pool)
     redis_client.ping()
     logger.info("Redis connection established")
 except Exception as e:
-    logger.warning(f"Redis connection failed: {e}. Falling back to in-memory cache.")
+    logger.warning("Redis connection failed: %s. Falling back to in-memory cache.", e)
     redis_client = None
 
 # In-memory cache fallback
@@ -123,7 +396,247 @@ class CircuitBreaker:
 
 wp_cli_circuit_breaker = CircuitBreaker()
 
+# Single-flight execution
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+    
+    The first caller runs the function; callers arriving while it is still
+    running wait for it and get the same result or exception.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Any, _Flight] = {}
+    
+    def do(self, key: Any, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        
+        try:
+            flight.result = func()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+wp_cli_flights = SingleFlight()
+
+# FastCGI client for the warm WP-CLI php-fpm pool
+FCGI_VERSION = 1
+FCGI_BEGIN_REQUEST = 1
+FCGI_END_REQUEST = 3
+FCGI_PARAMS = 4
+FCGI_STDIN = 5
+FCGI_STDOUT = 6
+FCGI_STDERR = 7
+FCGI_RESPONDER = 1
+FCGI_KEEP_CONN = 1
+FCGI_REQUEST_ID = 1
+FCGI_MAX_CONTENT = 65535
+FCGI_HEADER = struct.Struct('!BBHHBx')
+
+def _fcgi_record(record_type: int, content: bytes = b'') -> bytes:
+    return FCGI_HEADER.pack(FCGI_VERSION, record_type, FCGI_REQUEST_ID, len(content), 0) + content
+
+def _fcgi_stream(record_type: int, content: bytes) -> bytes:
+    """Split content into records and terminate the stream with an empty record."""
+    records = [
+        _fcgi_record(record_type, content[i:i + FCGI_MAX_CONTENT])
+        for i in range(0, len(content), FCGI_MAX_CONTENT)
+    ]
+    records.append(_fcgi_record(record_type))
+    return b''.join(records)
+
+def _fcgi_pair(name: str, value: str) -> bytes:
+    def encode_length(length: int) -> bytes:
+        return bytes([length]) if length < 128 else struct.pack('!I', length | 0x80000000)
+    name_bytes, value_bytes = name.encode(), value.encode()
+    return encode_length(len(name_bytes)) + encode_length(len(value_bytes)) + name_bytes + value_bytes
+
+class StaleConnectionError(ConnectionError):
+    """A FastCGI connection failed while the request was still being sent."""
+
+class FastCGIClient:
+    """Runs WP-CLI commands in a long-lived php-fpm pool over a Unix socket.
+    
+    Connections are kept open (FCGI_KEEP_CONN) and pooled per process id so
+    forked server workers never share a socket inherited from their parent.
+    An open connection holds a php-fpm child even while idle, so at most
+    pool_size connections are kept per process and the rest are closed.
+    """
+    
+    def __init__(self, socket_path: str, script_filename: str, pool_size: int = 1):
+        self.socket_path = socket_path
+        self.script_filename = script_filename
+        self.pool_size = pool_size
+        self._pools: Dict[int, List[socket.socket]] = {}
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    
+    def _acquire(self) -> Optional[socket.socket]:
+        """Return an idle pooled connection, dropping any that php-fpm has closed."""
+        while True:
+            with self._lock:
+                pool = self._pools.setdefault(os.getpid(), [])
+                if not pool:
+                    return None
+                sock = pool.pop()
+            if self._is_idle(sock):
+                return sock
+            sock.close()
+    
+    @staticmethod
+    def _is_idle(sock: socket.socket) -> bool:
+        # Between requests php-fpm sends nothing, so a readable socket means it
+        # closed the connection (EOF, reset) or is out of step with us
+        poller = select.poll()
+        poller.register(sock, select.POLLIN)
+        return not poller.poll(0)
+    
+    def _release(self, sock: socket.socket):
+        with self._lock:
+            pool = self._pools.setdefault(os.getpid(), [])
+            if len(pool) < self.pool_size:
+                pool.append(sock)
+                return
+        sock.close()
+    
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = sock.recv(size - len(buf))
+            if not chunk:
+                raise ConnectionError("FastCGI connection closed by php-fpm")
+            buf += chunk
+        return bytes(buf)
+    
+    def _read_response(self, sock: socket.socket) -> Tuple[bytes, bytes]:
+        stdout, stderr = bytearray(), bytearray()
+        while True:
+            _, record_type, _, content_length, padding_length = FCGI_HEADER.unpack(
+                self._recv_exact(sock, FCGI_HEADER.size)
+            )
+            content = self._recv_exact(sock, content_length + padding_length)[:content_length]
+            if record_type == FCGI_STDOUT:
+                stdout += content
+            elif record_type == FCGI_STDERR:
+                stderr += content
+            elif record_type == FCGI_END_REQUEST:
+                return bytes(stdout), bytes(stderr)
+    
+    def _exchange(self, sock: socket.socket, command: Tuple[str, ...], payload: bytes, timeout: int) -> Tuple[bytes, bytes]:
+        """Send one request and read its response; the socket is pooled again only on success."""
+        try:
+            sock.settimeout(timeout)
+            try:
+                sock.sendall(payload)
+            except socket.timeout:
+                raise
+            except OSError as e:
+                raise StaleConnectionError(f"FastCGI connection lost: {e}") from e
+            response = self._read_response(sock)
+        except socket.timeout:
+            sock.close()
+            raise subprocess.TimeoutExpired(command, timeout)
+        except BaseException:
+            sock.close()
+            raise
+        self._release(sock)
+        return response
+    
+    def run(self, command: Tuple[str, ...], timeout: int = 30) -> bytes:
+        """Execute a WP-CLI argv and return its raw stdout, raising like subprocess.run(check=True)."""
+        params = b''.join(_fcgi_pair(name, value) for name, value in (
+            ('SCRIPT_FILENAME', self.script_filename),
+            ('REQUEST_METHOD', 'GET'),
+            ('WP_CLI_ARGV', orjson.dumps(command).decode()),
+        ))
+        payload = (
+            _fcgi_record(FCGI_BEGIN_REQUEST, struct.pack('!HB5x', FCGI_RESPONDER, FCGI_KEEP_CONN))
+            + _fcgi_stream(FCGI_PARAMS, params)
+            + _fcgi_stream(FCGI_STDIN, b'')
+        )
+        
+        sock = self._acquire()
+        try:
+            raw_stdout, raw_stderr = self._exchange(sock or self._connect(), command, payload, timeout)
+        except StaleConnectionError:
+            if sock is None:
+                raise
+            # php-fpm closed the pooled connection between the idle check and
+            # the send. The request was not fully sent, so it cannot have run;
+            # resend it once. Failures after the send are never retried: an
+            # empty response does not prove php-fpm did not run the command.
+            raw_stdout, raw_stderr = self._exchange(self._connect(), command, payload, timeout)
+        
+        # php-fpm prefixes the body with CGI headers; boot-fpm.php reports
+        # WP-CLI failures through the Status and X-WP-CLI-Stderr headers.
+        head, _, body = raw_stdout.partition(b'\r\n\r\n')
+        headers = {}
+        for line in head.decode('latin-1').split('\r\n'):
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        
+        if headers.get('status', '200').startswith('5'):
+            stderr = urllib.parse.unquote_to_bytes(headers.get('x-wp-cli-stderr', '')) or raw_stderr
+            raise subprocess.CalledProcessError(1, command, output=body, stderr=stderr)
+        return body
+
+fastcgi_client = (
+    FastCGIClient(Config.WP_CLI_FPM_SOCKET, Config.WP_CLI_FPM_SCRIPT, Config.WP_CLI_FPM_POOL_SIZE)
+    if Config.WP_CLI_FPM_SOCKET else None
+)
+
 # Authentication decorators
+# Decoded JWT payloads keyed by the full token string, so a hit can only come
+# from the exact token that was verified; a hit skips the HMAC check and JSON
+# parsing. Entries are dropped once the token's own exp has passed.
+_JWT_CACHE = cachetools.TTLCache(maxsize=4096, ttl=300)
+_jwt_cache_lock = threading.Lock()
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Verify and decode a JWT, reusing the result for repeated tokens."""
+    with _jwt_cache_lock:
+        data = _JWT_CACHE.get(token)
+    if data is not None:
+        if 'exp' not in data or data['exp'] > time.time():
+            return data
+        with _jwt_cache_lock:
+            _JWT_CACHE.pop(token, None)
+    
+    data = jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=['HS256'])
+    with _jwt_cache_lock:
+        _JWT_CACHE[token] = data
+    return data
+
 def token_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -136,8 +649,7 @@ def token_required(f):
                 token = token[7:]
             
             # Verify JWT token
-            data = jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=['HS256'])
-            g.current_user = data
+            g.current_user = decode_token(token)
             
         except jwt.ExpiredSignatureError:
             return jsonify({'status': 'error', 'message': 'Token has expired'}), 401
@@ -147,11 +659,22 @@ def token_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Encoded once so each request only does a constant-time compare
+_API_KEY_BYTES = Config.AGENT_API_KEY.encode('utf-8') if Config.AGENT_API_KEY else None
+if _API_KEY_BYTES is None:
+    logger.warning("AGENT_API_KEY is not set; all API-key protected endpoints will reject requests.")
+
 def api_key_required(f):
+    if _API_KEY_BYTES is None:
+        @wraps(f)
+        def reject(*args, **kwargs):
+            return jsonify({'status': 'error', 'message': 'Invalid API key'}), 401
+        return reject
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        api_key = request.headers.get('X-API-Key')
-        if not api_key or api_key != Config.AGENT_API_KEY:
+        api_key = request.headers.get('X-API-Key', '').encode('utf-8')
+        if not hmac.compare_digest(api_key, _API_KEY_BYTES):
             return jsonify({'status': 'error', 'message': 'Invalid API key'}), 401
         return f(*args, **kwargs)
     return decorated_function
@@ -163,27 +686,25 @@ def log_request_info():
     g.start_time = start_time
     
     # Log request details
-    logger.info(f"Request: {request.method} {request.path} from {request.remote_addr}")
+    logger.info("Request: %s %s from %s", request.method, request.path, request.remote_addr)
     
     # Update metrics
-    ACTIVE_CONNECTIONS.inc()
+    request_metrics.request_started()
 
 @app.after_request
 def log_response_info(response):
     duration = time.time() - g.start_time
     
     # Log response details
-    logger.info(f"Response: {response.status_code} in {duration:.3f}s")
+    logger.info("Response: %s in %.3fs", response.status_code, duration)
     
     # Update metrics
-    REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=request.endpoint or 'unknown',
-        status=response.status_code
-    ).inc()
-    
-    REQUEST_DURATION.observe(duration)
-    ACTIVE_CONNECTIONS.dec()
+    request_metrics.request_finished(
+        request.method,
+        request.endpoint or 'unknown',
+        response.status_code,
+        duration
+    )
     
     return response
 
@@ -192,71 +713,210 @@ def cache_get(key: str) -> Optional[Any]:
     if redis_client:
         try:
             data = redis_client.get(key)
-            return json.loads(data) if data else None
+            return orjson.loads(data) if data else None
         except Exception as e:
-            logger.warning(f"Redis get failed: {e}")
+            logger.warning("Redis get failed: %s", e)
             return memory_cache.get(key)
     return memory_cache.get(key)
 
 def cache_set(key: str, value: Any, ttl: int = 300):
     if redis_client:
         try:
-            redis_client.setex(key, ttl, json.dumps(value))
+            redis_client.setex(key, ttl, orjson.dumps(value))
         except Exception as e:
-            logger.warning(f"Redis set failed: {e}")
+            logger.warning("Redis set failed: %s", e)
             memory_cache[key] = value
     else:
         memory_cache[key] = value
 
+def cache_invalidate(prefix: str):
+    """Drop every cached entry whose key starts with prefix."""
+    for key in [key for key in list(memory_cache) if key.startswith(prefix)]:
+        memory_cache.pop(key, None)
+    if redis_client:
+        try:
+            # DEL does not expand globs: collect the keys with SCAN, then free
+            # them with UNLINK (asynchronous in Redis) in one round trip
+            keys = list(redis_client.scan_iter(match=f"{prefix}*", count=500))
+            if keys:
+                pipe = redis_client.pipeline(transaction=False)
+                for start in range(0, len(keys), 500):
+                    pipe.unlink(*keys[start:start + 500])
+                pipe.execute()
+        except Exception as e:
+            logger.warning("Redis invalidation failed: %s", e)
+
+# Invalidation generations for the per-process caches below. Each entry
+# records the generation of its namespace when it was filled and is stale
+# once the generation moves on. The counters live in Redis, so a bump in one
+# worker invalidates every worker; without Redis they are per process.
+_local_generations: Dict[str, int] = collections.Counter()
+_generation_lock = threading.Lock()
+
+def cache_generation(namespace: str) -> int:
+    """Return the current invalidation generation of namespace."""
+    if redis_client:
+        try:
+            return int(redis_client.get(f"cache_generation:{namespace}") or 0)
+        except Exception as e:
+            logger.warning("Redis get failed: %s", e)
+    with _generation_lock:
+        return _local_generations[namespace]
+
+def bump_cache_generations(namespaces: List[str]):
+    """Invalidate everything cached under namespaces, in every process."""
+    with _generation_lock:
+        for namespace in namespaces:
+            _local_generations[namespace] += 1
+    if redis_client and namespaces:
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for namespace in namespaces:
+                pipe.incr(f"cache_generation:{namespace}")
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Redis invalidation failed: %s", e)
+
+# Per-process cache for tool lookups that rarely change:
+# {key: (expires_at, generation, value)}, namespaced by the key up to the first ':'
+_TOOL_CACHE: Dict[str, Tuple[float, int, Any]] = {}
+_tool_cache_lock = threading.Lock()
+
+def cached_call(key: str, ttl: float, func, refresh: bool = False) -> Any:
+    """Return func()'s result, reusing it for ttl seconds unless refresh is set.
+    
+    Entries are also dropped once invalidate_tool_cache is called for their
+    namespace in any process. Exceptions propagate and are not cached.
+    """
+    generation = cache_generation(f"tool:{key.partition(':')[0]}")
+    now = time.monotonic()
+    with _tool_cache_lock:
+        entry = _TOOL_CACHE.get(key)
+    if entry and entry[0] > now and entry[1] == generation and not refresh:
+        return entry[2]
+    
+    value = func()
+    with _tool_cache_lock:
+        _TOOL_CACHE[key] = (now + ttl, generation, value)
+    return value
+
+def invalidate_tool_cache(namespace: str):
+    """Drop cached tool lookups under namespace, e.g. 'theme'."""
+    bump_cache_generations([f"tool:{namespace}"])
+    prefix = f"{namespace}:"
+    with _tool_cache_lock:
+        for key in [key for key in _TOOL_CACHE if key.startswith(prefix)]:
+            del _TOOL_CACHE[key]
+
 # Enhanced WP-CLI command execution
+# Built once; every command is this prefix plus the tool's args. The binary
+# is resolved here so no call has to search PATH.
+WP_CLI_BASE_COMMAND = (shutil.which('wp') or 'wp', f'--path={Config.WP_PATH}', '--allow-root')
+# Command groups whose `get` results are cached
+WP_CLI_CACHED_GROUPS = frozenset({'option', 'post', 'plugin'})
+# Subcommands that only read, so concurrent identical calls may share a result
+WP_CLI_READ_ACTIONS = frozenset({'get', 'list'})
+
+def _execute_wp_cli(command: Tuple[str, ...], timeout: int) -> bytes:
+    """Run a WP-CLI argv in the php-fpm pool, or as a subprocess when the pool is unavailable."""
+    if fastcgi_client:
+        try:
+            return fastcgi_client.run(command, timeout=timeout)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            # Only raised while connecting, before php-fpm saw the command,
+            # so running it again as a subprocess cannot execute it twice.
+            logger.warning("php-fpm WP-CLI pool unavailable (%s), falling back to subprocess", e)
+    
+    result = subprocess.run(command, capture_output=True, check=True, timeout=timeout)
+    return result.stdout
+
 def run_wp_cli_command(args: List[str], decode_json: bool = False, timeout: int = 30) -> Any:
     """Enhanced WP-CLI command execution with error handling and logging."""
-    base_command = ['wp', f'--path={Config.WP_PATH}', '--allow-root']
-    command = base_command + args
+    command = WP_CLI_BASE_COMMAND + tuple(args)
     
     # Create cache key
-    cache_key = f"wp_cli:{hashlib.md5(':'.join(command).encode()).hexdigest()}"
+    # Keys are namespaced by command group so a group can be invalidated at once
+    cache_key = f"wp_cli:{args[0]}:{xxhash.xxh3_64_hexdigest(':'.join(command).encode())}"
     
     # Check cache for read-only commands
-    if args[0] in ['option', 'post', 'plugin'] and 'get' in args:
+    cacheable = args[0] in WP_CLI_CACHED_GROUPS and 'get' in args
+    if cacheable:
         cached_result = cache_get(cache_key)
         if cached_result:
             return cached_result
     
-    logger.info(f"Executing WP-CLI command: {' '.join(command)}")
-    
-    try:
-        result = wp_cli_circuit_breaker.call(
-            subprocess.run,
-            command,
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=timeout
-        )
+    def execute():
+        logger.info("Executing WP-CLI command: %s", command)
         
-        output = result.stdout.strip()
+        try:
+            output = wp_cli_circuit_breaker.call(_execute_wp_cli, command, timeout).strip()
         
-        if decode_json:
-            parsed_output = json.loads(output) if output else {}
-        else:
-            parsed_output = output
+            # Keep stdout as bytes: orjson parses straight from the pipe buffer
+            if decode_json:
+                parsed_output = orjson.loads(output) if output else {}
+            else:
+                parsed_output = output.decode('utf-8', 'replace')
+        
+            # Cache successful results
+            if cacheable:
+                cache_set(cache_key, parsed_output, ttl=600)
         
-        # Cache successful results
-        if args[0] in ['option', 'post', 'plugin'] and 'get' in args:
-            cache_set(cache_key, parsed_output, ttl=600)
+            return parsed_output
         
-        return parsed_output
+        except subprocess.TimeoutExpired:
+            logger.error("WP-CLI command timeout: %s", command)
+            raise Exception("Command timeout")
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode('utf-8', 'replace').strip() if e.stderr else ''
+            logger.error("WP-CLI command failed: %s", stderr)
+            raise Exception(f"WP-CLI Error: {stderr or 'Unknown error'}")
+        except orjson.JSONDecodeError as e:
+            logger.error("JSON decode error: %s", e)
+            raise Exception(f"Invalid JSON response: {output.decode('utf-8', 'replace')}")
+        except OSError as e:
+            # Includes a missing wp binary and php-fpm connection failures, which
+            # must not reach callers as a missing file or a bare socket error
+            logger.error("WP-CLI runner error: %s", e)
+            raise Exception(f"WP-CLI runner error: {e}")
         
-    except subprocess.TimeoutExpired:
-        logger.error(f"WP-CLI command timeout: {' '.join(command)}")
-        raise Exception("Command timeout")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"WP-CLI command failed: {e.stderr}")
-        raise Exception(f"WP-CLI Error: {e.stderr.strip() if e.stderr else 'Unknown error'}")
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error: {e}")
-        raise Exception(f"Invalid JSON response: {output}")
+    # Concurrent identical reads share one WP-CLI run; writes always run
+    if len(args) > 1 and args[1] in WP_CLI_READ_ACTIONS:
+        return wp_cli_flights.do((cache_key, decode_json), execute)
+    return execute()
+
+def _split_wp_cli_args(cmd_args: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+    """Split a WP-CLI argv into positional and associative arguments."""
+    positional, assoc_args = [], {}
+    for arg in cmd_args:
+        if arg.startswith('--'):
+            name, sep, value = arg[2:].partition('=')
+            assoc_args[name] = value if sep else True
+        else:
+            positional.append(arg)
+    return positional, assoc_args
+
+def run_wp_cli_batch(commands: List[List[str]], timeout: int = 300) -> List[Dict[str, Any]]:
+    """Run several WP-CLI commands in a single WordPress bootstrap via `wp eval-file`.
+    
+    Returns one {'return_code', 'stdout', 'stderr'} dict per command, in order.
+    """
+    ops = []
+    for cmd_args in commands:
+        positional, assoc_args = _split_wp_cli_args(cmd_args)
+        ops.append({'args': positional, 'assoc_args': assoc_args})
+    
+    with tempfile.NamedTemporaryFile('wb', suffix='.json', delete=False) as f:
+        f.write(orjson.dumps(ops))
+        ops_path = f.name
+    
+    try:
+        return run_wp_cli_command(
+            ['eval-file', Config.WP_CLI_BATCH_SCRIPT, ops_path],
+            decode_json=True,
+            timeout=timeout
+        )
+    finally:
+        os.unlink(ops_path)
 
 # Input validation
 def validate_input(data: Dict[str, Any], required_fields: List[str], field_types: Dict[str, type] = None) -> Dict[str, Any]:
@@ -275,30 +935,67 @@ def validate_input(data: Dict[str, Any], required_fields: List[str], field_types
     return args
 
 # File path validation
+# Trailing separator so '/var/www/html_evil' does not pass as inside '/var/www/html'
+_SAFE_BASE_PREFIX = Config.SAFE_BASE_PATH.rstrip(os.sep) + os.sep
+
+# Extensions are compared case-insensitively
+_ALLOWED_EXTENSIONS = frozenset(ext.strip().lower() for ext in Config.ALLOWED_EXTENSIONS)
+
+def _is_within_safe_base(path: str) -> bool:
+    return path == Config.SAFE_BASE_PATH or path.startswith(_SAFE_BASE_PREFIX)
+
+def _check_extension(path: str):
+    """Reject a normalized path whose file name has a disallowed extension.
+    
+    Same rules as Path.suffix (dotfiles and a trailing dot have none), without
+    building a Path. The path must be normalized first, so that trailing
+    separators or '.' components cannot hide the real file name.
+    """
+    stem, _, file_ext = os.path.basename(path).rpartition('.')
+    if stem and file_ext and file_ext.lower() not in _ALLOWED_EXTENSIONS:
+        raise PermissionError(f"File extension '{file_ext}' not allowed")
+
 def validate_file_path(file_path_str: str) -> str:
     """Enhanced file path validation with security checks."""
     # Normalize path and remove leading slashes
-    normalized_path = os.path.normpath(file_path_str.lstrip('/\\'))
-    
-    # Construct absolute path
-    abs_file_path = os.path.join(Config.SAFE_BASE_PATH, normalized_path)
-    real_abs_file_path = os.path.realpath(abs_file_path)
+    candidate = os.path.normpath(os.path.join(Config.SAFE_BASE_PATH, file_path_str.lstrip('/\\')))
     
-    # Security check: ensure path is within allowed directory
-    if not real_abs_file_path.startswith(Config.SAFE_BASE_PATH):
+    # Reject a bad extension or lexical traversal before touching the filesystem
+    _check_extension(candidate)
+    if not _is_within_safe_base(candidate):
         raise PermissionError(f"Path '{file_path_str}' is outside allowed directory")
     
-    # Check file extension
-    file_ext = Path(file_path_str).suffix.lstrip('.')
-    if file_ext and file_ext not in Config.ALLOWED_EXTENSIONS:
-        raise PermissionError(f"File extension '{file_ext}' not allowed")
+    # Symlinks can still point outside, or to a file with another extension;
+    # resolve on every call since the tree is writable by WordPress and plugins.
+    # Any component may be a symlink, so checking only the final one with
+    # islink() would not be enough.
+    real_abs_file_path = os.path.realpath(candidate)
+    if not _is_within_safe_base(real_abs_file_path):
+        raise PermissionError(f"Path '{file_path_str}' is outside allowed directory")
+    _check_extension(real_abs_file_path)
     
     return real_abs_file_path
 
+# File write utilities
+def write_file_bytes(path: str, data: bytes, flags: int = os.O_WRONLY | os.O_CREAT | os.O_TRUNC, sync: bool = False):
+    """Write bytes with raw os.write calls, bypassing the text I/O layer.
+    
+    With sync=True the data is fsynced to disk before the file is closed.
+    """
+    fd = os.open(path, flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        if sync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
 # Backup utilities
 def create_backup(file_path: str) -> str:
     """Create backup of file before modification."""
-    backup_dir = '/app/backups'
+    backup_dir = Config.BACKUP_DIR
     os.makedirs(backup_dir, exist_ok=True)
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -306,260 +1003,731 @@ def create_backup(file_path: str) -> str:
     backup_path = os.path.join(backup_dir, backup_name)
     
     try:
-        with open(file_path, 'rb') as src, open(backup_path, 'wb') as dst:
-            dst.write(src.read())
+        # Copies in the kernel (sendfile) without buffering the file in Python
+        shutil.copyfile(file_path, backup_path)
         return backup_path
     except Exception as e:
-        logger.error(f"Backup creation failed: {e}")
+        logger.error("Backup creation failed: %s", e)
         raise
 
 def cleanup_old_backups():
     """Clean up old backup files."""
-    backup_dir = '/app/backups'
+    backup_dir = Config.BACKUP_DIR
     if not os.path.exists(backup_dir):
         return
     
     cutoff_time = time.time() - (Config.BACKUP_RETENTION_DAYS * 24 * 60 * 60)
     
-    for file_path in Path(backup_dir).glob('*.backup'):
-        if file_path.stat().st_mtime < cutoff_time:
+    # scandir entries come straight from readdir, with no Path object per file
+    with os.scandir(backup_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.backup'):
+                continue
             try:
-                file_path.unlink()
-                logger.info(f"Cleaned up old backup: {file_path}")
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff_time:
+                    os.unlink(entry.path)
+                    logger.info("Cleaned up old backup: %s", entry.path)
             except Exception as e:
-                logger.error(f"Failed to clean up backup {file_path}: {e}")
+                logger.error("Failed to clean up backup %s: %s", entry.path, e)
 
 # Enhanced agent tools
+# Collects every version we report in one WP-CLI run, so WordPress boots once
+WP_VERSION_PROBE = (
+    'echo json_encode(array('
+    '"wordpress_version" => get_bloginfo("version"), '
+    '"db_version" => get_option("db_version"), '
+    '"locale" => get_locale(), '
+    '"wp_cli_version" => WP_CLI_VERSION, '
+    '"php_version" => PHP_VERSION'
+    '));'
+)
+
+def _probe_wordpress(refresh: bool = False) -> Dict[str, Any]:
+    """Read WordPress, WP-CLI and PHP versions, reporting failures inline."""
+    try:
+        return cached_call(
+            'sysinfo:wordpress', Config.SYSINFO_CACHE_TTL,
+            lambda: run_wp_cli_command(['eval', WP_VERSION_PROBE], decode_json=True),
+            refresh
+        )
+    except Exception as e:
+        logger.warning("Failed to get WordPress info: %s", e)
+        return {'error': str(e)}
+
 def get_system_information(data: Dict[str, Any]) -> Dict[str, Any]:
     """Get comprehensive system information."""
     logger.info("Executing get_system_information tool")
     
-    try:
-        info = {
-            'timestamp': datetime.now().isoformat(),
-            'system': {
-                'os': subprocess.run(['uname', '-a'], capture_output=True, text=True).stdout.strip(),
-                'uptime': subprocess.run(['uptime'], capture_output=True, text=True).stdout.strip(),
-                'memory': {
-                    'total': psutil.virtual_memory().total,
-                    'available': psutil.virtual_memory().available,
-                    'percent': psutil.virtual_memory().percent
-                },
-                'cpu': {
-                    'count': psutil.cpu_count(),
-                    'percent': psutil.cpu_percent(interval=1)
-                },
-                'disk': {
-                    'total': psutil.disk_usage('/').total,
-                    'used': psutil.disk_usage('/').used,
-                    'free': psutil.disk_usage('/').free,
-                    'percent': psutil.disk_usage('/').percent
-                }
-            },
-            'application': {
-                'python_version': sys.version,
-                'agent_version': '2.0.0',
-                'flask_version': flask.__version__
-            }
-        }
-        
-        # WordPress information
-        try:
-            wp_info = run_wp_cli_command(['core', 'version', '--extra', '--format=json'], decode_json=True)
-            info['wordpress'] = wp_info
-        except Exception as e:
-            logger.warning(f"Failed to get WordPress info: {e}")
-            info['wordpress'] = {'error': str(e)}
-        
-        # Update system metrics
-        SYSTEM_MEMORY.set(info['system']['memory']['percent'])
-        SYSTEM_CPU.set(info['system']['cpu']['percent'])
-        
-        return {'status': 'success', 'data': info}
-        
-    except Exception as e:
-        logger.error(f"Error in get_system_information: {e}")
-        return {'status': 'error', 'message': str(e)}
+    args = validate_input(data, [], {'refresh': bool})
+    refresh = args.get('refresh', False)
+    
+    info = {
+        'timestamp': datetime.now().isoformat(),
+        'system': {
+            'os': OS_DESCRIPTION,
+            **system_sampler.snapshot()
+        },
+        'application': {
+            'python_version': sys.version,
+            'agent_version': '2.0.0',
+            'flask_version': flask.__version__
+        },
+        'wordpress': _probe_wordpress(refresh)
+    }
+    
+    return {'status': 'success', 'data': info}
 
 def create_wordpress_post(data: Dict[str, Any]) -> Dict[str, Any]:
     """Create WordPress post with enhanced validation."""
     logger.info("Executing create_wordpress_post tool")
     
-    try:
-        args = validate_input(data, ['title', 'content'], {
-            'title': str,
-            'content': str,
-            'status': str,
-            'post_type': str
-        })
-        
-        # Sanitize inputs
-        title = args['title'][:200]  # Limit title length
-        content = args['content'][:50000]  # Limit content length
-        status = args.get('status', 'publish')
-        post_type = args.get('post_type', 'post')
-        
-        # Validate status and post_type
-        valid_statuses = ['publish', 'draft', 'pending', 'private']
-        valid_post_types = ['post', 'page']
-        
-        if status not in valid_statuses:
-            raise ValueError(f"Invalid status. Must be one of: {valid_statuses}")
-        
-        if post_type not in valid_post_types:
-            raise ValueError(f"Invalid post_type. Must be one of: {valid_post_types}")
-        
-        cmd_args = [
-            'post', 'create',
-            f'--post_title={title}',
-            f'--post_content={content}',
-            f'--post_status={status}',
-            f'--post_type={post_type}',
-            '--porcelain'
-        ]
-        
-        post_id = run_wp_cli_command(cmd_args)
-        
-        # Invalidate related caches
-        cache_keys = [f"wp_cli:*post*", f"wp_cli:*{post_type}*"]
-        for key in cache_keys:
-            if redis_client:
-                redis_client.delete(key)
-        
-        return {
-            'status': 'success',
-            'message': f'{post_type.capitalize()} created successfully',
-            'post_id': post_id,
-            'post_url': f"{os.environ.get('WORDPRESS_SITE_URL', 'http://localhost')}/?p={post_id}"
-        }
-        
-    except Exception as e:
-        logger.error(f"Error in create_wordpress_post: {e}")
-        return {'status': 'error', 'message': str(e)}
+    args = validate_input(data, ['title', 'content'], {
+        'title': str,
+        'content': str,
+        'status': str,
+        'post_type': str
+    })
+    
+    # Sanitize inputs
+    title = args['title'][:200]  # Limit title length
+    content = args['content'][:50000]  # Limit content length
+    status = args.get('status', 'publish')
+    post_type = args.get('post_type', 'post')
+    
+    # Validate status and post_type
+    valid_statuses = ['publish', 'draft', 'pending', 'private']
+    valid_post_types = ['post', 'page']
+    
+    if status not in valid_statuses:
+        raise ValueError(f"Invalid status. Must be one of: {valid_statuses}")
+    
+    if post_type not in valid_post_types:
+        raise ValueError(f"Invalid post_type. Must be one of: {valid_post_types}")
+    
+    cmd_args = [
+        'post', 'create',
+        f'--post_title={title}',
+        f'--post_content={content}',
+        f'--post_status={status}',
+        f'--post_type={post_type}',
+        '--porcelain'
+    ]
+    
+    post_id = run_wp_cli_command(cmd_args)
+    
+    # Pages are posts to WP-CLI too, so both live in the 'post' group
+    cache_invalidate('wp_cli:post:')
+    
+    return {
+        'status': 'success',
+        'message': f'{post_type.capitalize()} created successfully',
+        'post_id': post_id,
+        'post_url': f"{os.environ.get('WORDPRESS_SITE_URL', 'http://localhost')}/?p={post_id}"
+    }
 
-def read_file(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Read file with enhanced security and validation."""
-    logger.info("Executing read_file tool")
+# Base64 chunks must be a multiple of 3 bytes so they concatenate into one valid string
+READ_STREAM_CHUNK_SIZE = 3 * 16 * 1024
+
+def _stream_file_response(file_path_str: str, target_file_path: str, file_size: int) -> flask.Response:
+    """Stream a file as a JSON envelope with base64 content, holding one chunk in memory."""
+    last_modified = datetime.fromtimestamp(os.path.getmtime(target_file_path)).isoformat()
     
-    try:
-        args = validate_input(data, ['file_path'], {'file_path': str})
-        file_path_str = args['file_path']
-        
-        target_file_path = validate_file_path(file_path_str)
-        
-        if not os.path.exists(target_file_path):
-            return {'status': 'error', 'message': f'File not found: {file_path_str}'}
-        
-        if not os.path.isfile(target_file_path):
-            return {'status': 'error', 'message': f'Path is not a file: {file_path_str}'}
-        
-        # Check file size
-        file_size = os.path.getsize(target_file_path)
-        if file_size > Config.MAX_FILE_SIZE:
-            return {'status': 'error', 'message': f'File too large: {file_size} bytes'}
-        
-        with open(target_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Create file hash for integrity checking
-        file_hash = hashlib.sha256(content.encode()).hexdigest()
-        
-        return {
+    def generate():
+        prefix = orjson.dumps({
             'status': 'success',
             'file_path': file_path_str,
-            'content': content,
             'size': file_size,
-            'hash': file_hash,
-            'last_modified': datetime.fromtimestamp(os.path.getmtime(target_file_path)).isoformat()
-        }
+            'last_modified': last_modified,
+            'encoding': 'base64'
+        })
+        yield prefix[:-1] + b',"content":"'
         
-    except Exception as e:
-        logger.error(f"Error in read_file: {e}")
-        return {'status': 'error', 'message': str(e)}
+        file_hash = hashlib.sha256()
+        with open(target_file_path, 'rb') as f:
+            while True:
+                chunk = f.read(READ_STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                file_hash.update(chunk)
+                yield base64.b64encode(chunk)
+        
+        yield b'","hash":"' + file_hash.hexdigest().encode() + b'"}'
+    
+    return flask.Response(flask.stream_with_context(generate()), mimetype='application/json')
+
+def read_file(data: Dict[str, Any]) -> Any:
+    """Read file with enhanced security and validation.
+    
+    Files at or above READ_STREAM_THRESHOLD are streamed with base64 content
+    unless the 'stream' argument is false.
+    """
+    logger.info("Executing read_file tool")
+    
+    args = validate_input(data, ['file_path'], {'file_path': str, 'stream': bool})
+    file_path_str = args['file_path']
+    
+    target_file_path = validate_file_path(file_path_str)
+    
+    if not os.path.exists(target_file_path):
+        raise FileNotFoundError(f'File not found: {file_path_str}')
+    
+    if not os.path.isfile(target_file_path):
+        raise ValueError(f'Path is not a file: {file_path_str}')
+    
+    # Check file size
+    file_size = os.path.getsize(target_file_path)
+    if file_size > Config.MAX_FILE_SIZE:
+        raise ValueError(f'File too large: {file_size} bytes')
+    
+    if file_size >= Config.READ_STREAM_THRESHOLD and args.get('stream', True):
+        return _stream_file_response(file_path_str, target_file_path, file_size)
+    
+    with open(target_file_path, 'rb') as f:
+        raw = f.read()
+    
+    # Hash the bytes as stored, matching the hash of a streamed read
+    file_hash = hashlib.sha256(raw).hexdigest()
+    content = raw.decode('utf-8')
+    
+    return {
+        'status': 'success',
+        'file_path': file_path_str,
+        'content': content,
+        'size': file_size,
+        'hash': file_hash,
+        'last_modified': datetime.fromtimestamp(os.path.getmtime(target_file_path)).isoformat()
+    }
 
 def edit_file(data: Dict[str, Any]) -> Dict[str, Any]:
     """Edit file with backup and validation."""
     logger.info("Executing edit_file tool")
     
+    args = validate_input(data, ['file_path', 'content'], {
+        'file_path': str,
+        'content': str
+    })
+    
+    file_path_str = args['file_path']
+    content = args['content']
+    
+    target_file_path = validate_file_path(file_path_str)
+    content_bytes = content.encode('utf-8')
+    
+    # Check content size
+    if len(content_bytes) > Config.MAX_FILE_SIZE:
+        raise ValueError('Content too large')
+    
+    # Create backup if file exists
+    backup_path = None
+    if os.path.exists(target_file_path):
+        backup_path = create_backup(target_file_path)
+    
+    # Write file atomically
+    temp_file = f"{target_file_path}.tmp"
     try:
-        args = validate_input(data, ['file_path', 'content'], {
-            'file_path': str,
-            'content': str
-        })
+        write_file_bytes(temp_file, content_bytes, sync=True)
         
-        file_path_str = args['file_path']
-        content = args['content']
+        # Atomic rename; the temp file is already on disk, so no read-back is needed
+        os.replace(temp_file, target_file_path)
         
-        target_file_path = validate_file_path(file_path_str)
+        # Create content hash
+        content_hash = hashlib.sha256(content_bytes).hexdigest()
         
-        # Check content size
-        if len(content.encode()) > Config.MAX_FILE_SIZE:
-            return {'status': 'error', 'message': 'Content too large'}
-        
-        # Create backup if file exists
-        backup_path = None
-        if os.path.exists(target_file_path):
-            backup_path = create_backup(target_file_path)
+        return {
+            'status': 'success',
+            'message': f'File {file_path_str} written successfully',
+            'backup_path': backup_path,
+            'size': len(content_bytes),
+            'hash': content_hash
+        }
         
-        # Write file atomically
-        temp_file = f"{target_file_path}.tmp"
-        try:
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            # Atomic rename
-            os.rename(temp_file, target_file_path)
-            
-            # Verify write
-            with open(target_file_path, 'r', encoding='utf-8') as f:
-                written_content = f.read()
-            
-            if written_content != content:
-                raise Exception("File write verification failed")
-            
-            # Create content hash
-            content_hash = hashlib.sha256(content.encode()).hexdigest()
-            
-            return {
-                'status': 'success',
-                'message': f'File {file_path_str} written successfully',
-                'backup_path': backup_path,
-                'size': len(content.encode()),
-                'hash': content_hash
-            }
-            
-        except Exception as e:
-            # Cleanup temp file
-            if os.path.exists(temp_file):
-                os.unlink(temp_file)
-            raise
-            
-    except Exception as e:
-        logger.error(f"Error in edit_file: {e}")
-        return {'status': 'error', 'message': str(e)}
+    except Exception:
+        # Cleanup temp file
+        if os.path.exists(temp_file):
+            os.unlink(temp_file)
+        raise
 
 # Additional tools
+# WP-CLI argv of the read-only list tools, shared with run_tool_batch
+PLUGIN_LIST_COMMAND = ('plugin', 'list', '--format=json')
+THEME_LIST_COMMAND = ('theme', 'list', '--format=json')
+ACTIVE_THEME_COMMAND = ('theme', 'list', '--status=active', '--format=json')
+
 def get_wordpress_plugins(data: Dict[str, Any]) -> Dict[str, Any]:
     """Get WordPress plugins list."""
     logger.info("Executing get_wordpress_plugins tool")
     
-    try:
-        plugins = run_wp_cli_command(['plugin', 'list', '--format=json'], decode_json=True)
-        return {'status': 'success', 'plugins': plugins}
-    except Exception as e:
-        logger.error(f"Error in get_wordpress_plugins: {e}")
-        return {'status': 'error', 'message': str(e)}
+    plugins = run_wp_cli_command(PLUGIN_LIST_COMMAND, decode_json=True)
+    return {'status': 'success', 'plugins': plugins}
 
 def get_wordpress_themes(data: Dict[str, Any]) -> Dict[str, Any]:
     """Get WordPress themes list."""
     logger.info("Executing get_wordpress_themes tool")
     
+    args = validate_input(data, [], {'refresh': bool})
+    themes = cached_call(
+        'theme:list', Config.THEME_CACHE_TTL,
+        lambda: run_wp_cli_command(THEME_LIST_COMMAND, decode_json=True),
+        args.get('refresh', False)
+    )
+    return {'status': 'success', 'themes': themes}
+
+def backup_database(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Create database backup using WP-CLI."""
+    logger.info("Executing backup_database tool")
+    
+    backup_dir = Config.BACKUP_DIR
+    os.makedirs(backup_dir, exist_ok=True)
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    backup_path = os.path.join(backup_dir, f"database_{timestamp}.sql")
+    
+    run_wp_cli_command(['db', 'export', backup_path], timeout=300)
+    
+    return {
+        'status': 'success',
+        'message': 'Database backup created successfully',
+        'backup_path': backup_path,
+        'size': os.path.getsize(backup_path)
+    }
+
+def _option_get_command(data: Dict[str, Any]) -> List[str]:
+    """Build the WP-CLI argv for get_wordpress_option."""
+    args = validate_input(data, ['option_name'], {'option_name': str})
+    return ['option', 'get', args['option_name'], '--format=json']
+
+def get_wordpress_option(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Get WordPress option value."""
+    logger.info("Executing get_wordpress_option tool")
+    
+    cmd_args = _option_get_command(data)
+    value = run_wp_cli_command(cmd_args, decode_json=True)
+    return {'status': 'success', 'option_name': cmd_args[2], 'value': value}
+
+def _option_update_command(data: Dict[str, Any]) -> List[str]:
+    """Build the WP-CLI argv for update_wordpress_option."""
+    args = validate_input(data, ['option_name', 'option_value'], {'option_name': str})
+    option_name = args['option_name']
+    option_value = args['option_value']
+    
+    cmd_args = ['option', 'update', option_name]
+    # Structured values are passed to WP-CLI as JSON
+    if isinstance(option_value, (dict, list)):
+        cmd_args.extend([orjson.dumps(option_value).decode(), '--format=json'])
+    else:
+        cmd_args.append(str(option_value))
+    return cmd_args
+
+def update_wordpress_option(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Update WordPress option value."""
+    return _run_wp_cli_tool('update_wordpress_option', data)
+
+def append_to_file(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Append content to file with backup and validation."""
+    logger.info("Executing append_to_file tool")
+    
+    args = validate_input(data, ['file_path', 'content'], {
+        'file_path': str,
+        'content': str
+    })
+    
+    file_path_str = args['file_path']
+    content = args['content']
+    
+    target_file_path = validate_file_path(file_path_str)
+    content_bytes = content.encode('utf-8')
+    
+    # Check resulting file size
+    current_size = os.path.getsize(target_file_path) if os.path.exists(target_file_path) else 0
+    if current_size + len(content_bytes) > Config.MAX_FILE_SIZE:
+        raise ValueError('Content too large')
+    
+    backup_path = None
+    if os.path.exists(target_file_path):
+        backup_path = create_backup(target_file_path)
+    
+    write_file_bytes(target_file_path, content_bytes, os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+    
+    return {
+        'status': 'success',
+        'message': f'Content appended to file {file_path_str} successfully',
+        'backup_path': backup_path
+    }
+
+def _slug_command(group: str, action: str, slug_field: str, allow_version: bool = False):
+    """Return an argv builder for a plugin/theme subcommand that operates on a single slug."""
+    def build(data: Dict[str, Any]) -> List[str]:
+        args = validate_input(data, [slug_field], {slug_field: str, 'version': str})
+        cmd_args = [group, action, args[slug_field]]
+        if allow_version and args.get('version'):
+            cmd_args.append(f"--version={args['version']}")
+        return cmd_args
+    return build
+
+def _run_wp_cli_tool(tool_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a tool that maps directly onto a single WP-CLI command."""
+    logger.info("Executing %s tool", tool_name)
+    
+    cmd_args = WP_CLI_COMMAND_BUILDERS[tool_name](data)
+    result = run_wp_cli_command(cmd_args, timeout=120 if cmd_args[1] == 'install' else 30)
+    invalidate_tool_cache(cmd_args[0])
+    cache_invalidate(f"wp_cli:{cmd_args[0]}:")
+    return {'status': 'success', 'message': result}
+
+def install_wordpress_plugin(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Install WordPress plugin."""
+    return _run_wp_cli_tool('install_wordpress_plugin', data)
+
+def activate_wordpress_plugin(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Activate WordPress plugin."""
+    return _run_wp_cli_tool('activate_wordpress_plugin', data)
+
+def deactivate_wordpress_plugin(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Deactivate WordPress plugin."""
+    return _run_wp_cli_tool('deactivate_wordpress_plugin', data)
+
+def delete_wordpress_plugin(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Delete WordPress plugin."""
+    return _run_wp_cli_tool('delete_wordpress_plugin', data)
+
+def install_wordpress_theme(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Install WordPress theme."""
+    return _run_wp_cli_tool('install_wordpress_theme', data)
+
+def activate_wordpress_theme(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Activate WordPress theme."""
+    return _run_wp_cli_tool('activate_wordpress_theme', data)
+
+def delete_wordpress_theme(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Delete WordPress theme."""
+    return _run_wp_cli_tool('delete_wordpress_theme', data)
+
+def get_active_wordpress_theme(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the active WordPress theme."""
+    logger.info("Executing get_active_wordpress_theme tool")
+    
+    args = validate_input(data, [], {'refresh': bool})
+    themes = cached_call(
+        'theme:active', Config.THEME_CACHE_TTL,
+        lambda: run_wp_cli_command(ACTIVE_THEME_COMMAND, decode_json=True),
+        args.get('refresh', False)
+    )
+    return {'status': 'success', 'data': themes[0] if themes else None}
+
+# Tools that map onto a single WP-CLI command; these can be grouped in a batch
+WP_CLI_COMMAND_BUILDERS = {
+    'install_wordpress_plugin': _slug_command('plugin', 'install', 'plugin_slug', allow_version=True),
+    'activate_wordpress_plugin': _slug_command('plugin', 'activate', 'plugin_slug'),
+    'deactivate_wordpress_plugin': _slug_command('plugin', 'deactivate', 'plugin_slug'),
+    'delete_wordpress_plugin': _slug_command('plugin', 'delete', 'plugin_slug'),
+    'install_wordpress_theme': _slug_command('theme', 'install', 'theme_slug', allow_version=True),
+    'activate_wordpress_theme': _slug_command('theme', 'activate', 'theme_slug'),
+    'delete_wordpress_theme': _slug_command('theme', 'delete', 'theme_slug'),
+    'update_wordpress_option': _option_update_command,
+}
+
+# Read-only tools that map onto a single JSON-printing WP-CLI command, as
+# (argv builder, result builder) pairs, so a batch can run them in its shared
+# WordPress bootstrap as well
+WP_CLI_READ_COMMANDS = {
+    'get_wordpress_plugins': (lambda data: PLUGIN_LIST_COMMAND, lambda cmd_args, output: {'plugins': output}),
+    'get_wordpress_themes': (lambda data: THEME_LIST_COMMAND, lambda cmd_args, output: {'themes': output}),
+    'list_wordpress_themes': (lambda data: THEME_LIST_COMMAND, lambda cmd_args, output: {'themes': output}),
+    'get_active_wordpress_theme': (
+        lambda data: ACTIVE_THEME_COMMAND,
+        lambda cmd_args, output: {'data': output[0] if output else None}
+    ),
+    'get_wordpress_option': (
+        _option_get_command,
+        lambda cmd_args, output: {'option_name': cmd_args[2], 'value': output}
+    ),
+}
+
+# Tool registry, frozen at import
+TOOLS = types.MappingProxyType({
+    'get_system_information': get_system_information,
+    'create_wordpress_post': create_wordpress_post,
+    'read_file': read_file,
+    'edit_file': edit_file,
+    'append_to_file': append_to_file,
+    'get_wordpress_plugins': get_wordpress_plugins,
+    'install_wordpress_plugin': install_wordpress_plugin,
+    'activate_wordpress_plugin': activate_wordpress_plugin,
+    'deactivate_wordpress_plugin': deactivate_wordpress_plugin,
+    'delete_wordpress_plugin': delete_wordpress_plugin,
+    'get_wordpress_themes': get_wordpress_themes,
+    'list_wordpress_themes': get_wordpress_themes,
+    'get_active_wordpress_theme': get_active_wordpress_theme,
+    'install_wordpress_theme': install_wordpress_theme,
+    'activate_wordpress_theme': activate_wordpress_theme,
+    'delete_wordpress_theme': delete_wordpress_theme,
+    'get_wordpress_option': get_wordpress_option,
+    'update_wordpress_option': update_wordpress_option,
+    'backup_database': backup_database,
+})
+
+# Short-lived response cache for read-only tools, keyed by (tool, generation, args)
+CACHEABLE_TOOLS = frozenset({
+    'get_system_information',
+    'get_wordpress_option',
+    'get_wordpress_themes',
+    'list_wordpress_themes',
+    'get_active_wordpress_theme',
+    'read_file',
+})
+
+_THEME_LOOKUPS = ('get_wordpress_themes', 'list_wordpress_themes', 'get_active_wordpress_theme')
+
+# Cached read-only tools made stale by each mutating tool
+CACHE_INVALIDATIONS = {
+    'update_wordpress_option': ('get_wordpress_option',),
+    'install_wordpress_theme': _THEME_LOOKUPS,
+    'activate_wordpress_theme': _THEME_LOOKUPS,
+    'delete_wordpress_theme': _THEME_LOOKUPS,
+    'edit_file': ('read_file',),
+    'append_to_file': ('read_file',),
+}
+
+response_cache = cachetools.TTLCache(maxsize=Config.RESPONSE_CACHE_SIZE, ttl=Config.RESPONSE_CACHE_TTL)
+_response_cache_lock = threading.Lock()
+
+def invalidate_responses(tool_name: str):
+    """Drop cached responses made stale by a call to tool_name, in every process."""
+    stale_tools = CACHE_INVALIDATIONS.get(tool_name)
+    if not stale_tools:
+        return
+    bump_cache_generations([f"response:{tool}" for tool in stale_tools])
+    with _response_cache_lock:
+        for key in [key for key in response_cache if key[0] in stale_tools]:
+            response_cache.pop(key, None)
+
+def call_tool(tool_name: str, tool_function, data: Dict[str, Any]) -> Tuple[Any, int]:
+    """Run a tool and return its result together with an HTTP status code.
+    
+    Read-only tools are served from the response cache when possible; a
+    mutating tool invalidates the responses it affects in every worker.
+    Tools raise on failure: invalid arguments (ValueError, PermissionError)
+    map to 400, a missing file (FileNotFoundError) to 404, and anything else
+    is logged and mapped to 500.
+    """
+    args = data.get('args') or {}
+    cache_key = None
+    if tool_name in CACHEABLE_TOOLS and isinstance(args, dict) and not args.get('refresh'):
+        cache_key = (
+            tool_name,
+            cache_generation(f"response:{tool_name}"),
+            orjson.dumps(args, option=orjson.OPT_SORT_KEYS)
+        )
+        with _response_cache_lock:
+            cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached, 200
+    
     try:
-        themes = run_wp_cli_command(['theme', 'list', '--format=json'], decode_json=True)
-        return {'status': 'success', 'themes': themes}
+        result = tool_function(data)
+    except (ValueError, PermissionError) as e:
+        logger.warning("Rejected %s call: %s", tool_name, e)
+        return {'status': 'error', 'message': str(e)}, 400
+    except FileNotFoundError as e:
+        logger.warning("Rejected %s call: %s", tool_name, e)
+        return {'status': 'error', 'message': str(e)}, 404
     except Exception as e:
-        logger.error(f"Error in get_wordpress_themes: {e}")
-        return {'status': 'error', 'message': str(e)}
+        logger.exception("Error in %s: %s", tool_name, e)
+        return {'status': 'error', 'message': str(e)}, 500
+    
+    # Only plain successful results are cached; streamed responses are not
+    if cache_key and isinstance(result, dict) and result.get('status') == 'success':
+        with _response_cache_lock:
+            response_cache[cache_key] = result
+    invalidate_responses(tool_name)
+    return result, 200
 
-def backup_database(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Create database
+def run_tool_batch(batch: List[Any]) -> List[Dict[str, Any]]:
+    """Run a list of tool calls in order, returning one result per call.
+    
+    Consecutive tools that map onto a single WP-CLI command, reads and writes
+    alike, are grouped into one run_wp_cli_batch call so they share a WordPress
+    bootstrap; other tools run in-process between groups. Commands in a group
+    run in order, so a read sees the writes queued before it.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+    # (index, tool name, argv, result builder); writes have no result builder
+    pending: List[Tuple[int, str, List[str], Optional[Callable]]] = []
+    
+    def render(output: Dict[str, Any], cmd_args: List[str], build_result: Optional[Callable]) -> Dict[str, Any]:
+        if output['return_code'] != 0:
+            return {'status': 'error', 'message': f"WP-CLI Error: {output['stderr'] or 'Unknown error'}"}
+        if build_result is None:
+            return {'status': 'success', 'message': output['stdout']}
+        try:
+            parsed = orjson.loads(output['stdout']) if output['stdout'] else {}
+        except orjson.JSONDecodeError:
+            return {'status': 'error', 'message': f"Invalid JSON response: {output['stdout']}"}
+        return {'status': 'success', **build_result(cmd_args, parsed)}
+    
+    def flush():
+        if not pending:
+            return
+        try:
+            outputs = run_wp_cli_batch([cmd_args for _, _, cmd_args, _ in pending])
+            if not isinstance(outputs, list):
+                outputs = []
+            for position, (index, _, cmd_args, build_result) in enumerate(pending):
+                if position < len(outputs):
+                    results[index] = render(outputs[position], cmd_args, build_result)
+                else:
+                    # The batch script stopped before reaching this command
+                    results[index] = {'status': 'error', 'message': 'No result from WP-CLI batch'}
+        except Exception as e:
+            logger.error("Error in WP-CLI batch: %s", e)
+            for index, _, _, _ in pending:
+                results[index] = {'status': 'error', 'message': str(e)}
+        finally:
+            # Only once the writes have run (or failed): a read made meanwhile
+            # saw the old state and must not stay cached as fresh
+            written_groups = set()
+            for _, tool_name, cmd_args, build_result in pending:
+                if build_result is None:
+                    written_groups.add(cmd_args[0])
+                    invalidate_responses(tool_name)
+            for group in written_groups:
+                invalidate_tool_cache(group)
+                cache_invalidate(f"wp_cli:{group}:")
+            pending.clear()
+    
+    for index, item in enumerate(batch):
+        tool_name = item.get('tool') if isinstance(item, dict) else None
+        tool_function = TOOLS.get(tool_name)
+        if tool_function is None:
+            results[index] = {'status': 'error', 'message': f'Unknown tool: {tool_name}'}
+            continue
+        if tool_rate_limited(tool_name):
+            results[index] = {'status': 'error', 'message': f'Rate limit exceeded for tool: {tool_name}'}
+            continue
+        
+        builder, build_result = WP_CLI_READ_COMMANDS.get(tool_name, (WP_CLI_COMMAND_BUILDERS.get(tool_name), None))
+        if builder:
+            try:
+                pending.append((index, tool_name, list(builder(item)), build_result))
+            except ValueError as e:
+                results[index] = {'status': 'error', 'message': str(e)}
+            continue
+        
+        flush()
+        # Batch results are collected into one body, so tools must not stream
+        args = item.get('args') or {}
+        if isinstance(args, dict):
+            item = {**item, 'args': {**args, 'stream': False}}
+        results[index], _ = call_tool(tool_name, tool_function, item)
+    
+    flush()
+    return results
+
+# API endpoints
+def _json_response(obj: Any, status: int = 200) -> flask.Response:
+    """Serialize a response body with orjson."""
+    return flask.Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+@app.route('/a2a/task', methods=['POST'])
+@limiter.limit(Config.A2A_RATE_LIMIT)
+@api_key_required
+def handle_a2a_task():
+    """Dispatch an A2A task to the requested tool."""
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return _json_response({'status': 'error', 'message': 'Invalid JSON payload'}, 400)
+        
+        batch = data.get('batch')
+        if batch is not None:
+            if not isinstance(batch, list) or not batch:
+                return _json_response({'status': 'error', 'message': "'batch' must be a non-empty list"}, 400)
+            if len(batch) > Config.MAX_BATCH_SIZE:
+                return _json_response(
+                    {'status': 'error', 'message': f"'batch' is limited to {Config.MAX_BATCH_SIZE} tasks"}, 400
+                )
+            logger.info("Received A2A batch of %s tasks", len(batch))
+            return _json_response({'status': 'success', 'results': run_tool_batch(batch)})
+        
+        tool_name = data.get('tool')
+        if not tool_name:
+            return _json_response({'status': 'error', 'message': "Missing 'tool' field in request"}, 400)
+        
+        tool_function = TOOLS.get(tool_name)
+        if tool_function is None:
+            logger.warning("Unknown tool requested: %s", tool_name)
+            return _json_response({'status': 'error', 'message': f'Unknown tool: {tool_name}'}, 404)
+        
+        if tool_rate_limited(tool_name):
+            return _json_response({'status': 'error', 'message': f'Rate limit exceeded for tool: {tool_name}'}, 429)
+        
+        logger.info("Received A2A task for tool: %s", tool_name)
+        result, status = call_tool(tool_name, tool_function, data)
+        if isinstance(result, flask.Response):
+            return result
+        return _json_response(result, status)
+        
+    except Exception as e:
+        logger.error("Unhandled error in /a2a/task: %s", e, exc_info=True)
+        return _json_response({'status': 'error', 'message': 'An internal error occurred'}, 500)
+
+@app.route('/health', methods=['GET'])
+@limiter.exempt
+def health_check():
+    """Health check endpoint."""
+    health = {'status': 'healthy', 'timestamp': datetime.now().isoformat()}
+    
+    if redis_client:
+        try:
+            redis_client.ping()
+            health['redis'] = 'connected'
+        except Exception:
+            health['redis'] = 'disconnected'
+    
+    return _json_response(health, 200)
+
+# Last rendered /metrics body and its render time (monotonic), per process.
+# Nothing invalidates it, so it needs no shared generation, only the TTL.
+_metrics_body: Optional[bytes] = None
+_metrics_rendered_at = 0.0
+_metrics_lock = threading.Lock()
+
+def render_metrics() -> bytes:
+    """Return the Prometheus output, rendering it again once METRICS_CACHE_TTL has passed."""
+    global _metrics_body, _metrics_rendered_at
+    with _metrics_lock:
+        now = time.monotonic()
+        if _metrics_body is None or now - _metrics_rendered_at >= Config.METRICS_CACHE_TTL:
+            request_metrics.flush()
+            _metrics_body = generate_latest()
+            _metrics_rendered_at = now
+        return _metrics_body
+
+if Config.ENABLE_PROMETHEUS:
+    # Scrapes within METRICS_CACHE_TTL of each other reuse the rendered output
+    @app.route('/metrics', methods=['GET'])
+    @limiter.exempt
+    def metrics():
+        """Prometheus metrics endpoint."""
+        return render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+# Background maintenance
+def _maintenance_loop(interval: int = 3600):
+    """Periodically clean up old backups."""
+    while True:
+        cleanup_old_backups()
+        time.sleep(interval)
+
+threading.Thread(target=_maintenance_loop, daemon=True).start()
+
+def _handle_shutdown(signum, frame):
+    logger.info("Received signal %s, shutting down", signum)
+    sys.exit(0)
+
+# Development server only; production runs under gunicorn (config/gunicorn.conf.py)
+if __name__ == '__main__':
+    signal.signal(signal.SIGTERM, _handle_shutdown)
+    signal.signal(signal.SIGINT, _handle_shutdown)
+    
+    logger.info("Agent A2A server starting on port 5000...")
+    app.run(host='0.0.0.0', port=5000, debug=False)
@@ -0,0 +1,46 @@
+<?php
+/**
+ * Boots WP-CLI inside a warm php-fpm worker.
+ *
+ * The agent passes the full argv as JSON in the WP_CLI_ARGV FastCGI param.
+ * STDOUT is routed through the output buffer so it becomes the response
+ * body; STDERR is captured and returned in the X-WP-CLI-Stderr header,
+ * with a 500 status when WP-CLI reported an error.
+ */
+
+$argv = json_decode( $_SERVER['WP_CLI_ARGV'] ?? '[]', true );
+if ( ! is_array( $argv ) || empty( $argv ) ) {
+	header( 'Status: 400 Bad Request' );
+	echo "Missing WP_CLI_ARGV\n";
+	return;
+}
+
+$_SERVER['argv']    = $argv;
+$_SERVER['argc']    = count( $argv );
+$GLOBALS['argv']    = $argv;
+$GLOBALS['argc']    = count( $argv );
+
+ob_start();
+
+define( 'STDIN', fopen( 'php://memory', 'r' ) );
+define( 'STDOUT', fopen( 'php://output', 'w' ) );
+define( 'STDERR', fopen( 'php://temp', 'w+' ) );
+
+register_shutdown_function( function () {
+	rewind( STDERR );
+	$stderr = stream_get_contents( STDERR );
+	if ( '' !== $stderr ) {
+		header( 'X-WP-CLI-Stderr: ' . rawurlencode( substr( $stderr, 0, 8192 ) ) );
+	}
+	if ( preg_match( '/^Error:/m', $stderr ) ) {
+		header( 'Status: 500 WP-CLI Error' );
+	}
+} );
+
+$phar = getenv( 'WP_CLI_PHAR' ) ?: '/usr/local/bin/wp';
+Phar::loadPhar( $phar, 'wp-cli.phar' );
+
+define( 'WP_CLI_PHAR_PATH', $phar );
+define( 'WP_CLI_ROOT', 'phar://wp-cli.phar' );
+
+include WP_CLI_ROOT . '/php/wp-cli.php';
@@ -0,0 +1,56 @@
+"""Gunicorn settings for the agent.
+
+Tool calls block on WP-CLI processes, so threaded workers (gthread) are used:
+a thread waiting on a child process releases the GIL and the other threads keep
+serving requests. Any setting can be overridden through GUNICORN_CMD_ARGS,
+e.g. GUNICORN_CMD_ARGS="--threads 16 --workers 2".
+"""
+import multiprocessing
+import os
+import re
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = 'gthread'
+# Capped so the default stays below the php-fpm WP-CLI pool's max_children
+# (see on_starting); threads, not workers, carry most of the concurrency
+workers = int(os.environ.get('GUNICORN_WORKERS', min(multiprocessing.cpu_count(), 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+
+# Longer than the slowest WP-CLI call (database export, 300s)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '330'))
+graceful_timeout = 30
+
+max_requests = int(os.environ.get('MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', '50'))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+
+def on_starting(server):
+    """Refuse to start when pooled WP-CLI connections could pin every php-fpm child.
+
+    Each worker keeps up to WP_CLI_FPM_POOL_SIZE idle FastCGI connections and
+    php-fpm dedicates a child to each one, so the pool needs more children
+    than workers x pool size or a worker can wait forever for a free child.
+    """
+    if not os.environ.get('WP_CLI_FPM_SOCKET'):
+        return
+    fpm_conf = os.environ.get('WP_CLI_FPM_CONF', '/app/config/php-fpm-wp-cli.conf')
+    try:
+        with open(fpm_conf, encoding='utf-8') as f:
+            match = re.search(r'^\s*pm\.max_children\s*=\s*(\d+)', f.read(), re.MULTILINE)
+    except OSError as e:
+        server.log.warning("Cannot read %s (%s); skipping the php-fpm pool size check", fpm_conf, e)
+        return
+    if match is None:
+        return
+
+    max_children = int(match.group(1))
+    pooled = server.cfg.workers * int(os.environ.get('WP_CLI_FPM_POOL_SIZE', '1'))
+    if pooled >= max_children:
+        raise RuntimeError(
+            f"pm.max_children ({max_children}) in {fpm_conf} must exceed workers x "
+            f"WP_CLI_FPM_POOL_SIZE ({pooled}); raise max_children or lower the pool size"
+        )
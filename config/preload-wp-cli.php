@@ -0,0 +1,28 @@
+<?php
+/**
+ * opcache.preload script for the WP-CLI php-fpm pool.
+ *
+ * Compiles every PHP file in the WP-CLI phar into shared memory when the
+ * php-fpm master starts, so pool workers never parse them per request.
+ * The phar is loaded under the same alias as config/boot-fpm.php, so the
+ * preloaded scripts match the paths the workers include.
+ */
+
+$phar = getenv( 'WP_CLI_PHAR' ) ?: '/usr/local/bin/wp';
+Phar::loadPhar( $phar, 'wp-cli.phar' );
+
+$files = new RecursiveIteratorIterator(
+	new RecursiveDirectoryIterator( 'phar://wp-cli.phar', FilesystemIterator::SKIP_DOTS )
+);
+
+foreach ( $files as $file ) {
+	if ( 'php' !== $file->getExtension() ) {
+		continue;
+	}
+	try {
+		opcache_compile_file( $file->getPathname() );
+	} catch ( Throwable $e ) {
+		// Files that fail to compile stand-alone are simply loaded on demand.
+		continue;
+	}
+}
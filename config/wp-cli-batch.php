@@ -0,0 +1,38 @@
+<?php
+/**
+ * Runs a batch of WP-CLI commands inside one WordPress bootstrap.
+ *
+ * Invoked as `wp eval-file wp-cli-batch.php <ops.json>`, where ops.json holds
+ * a list of {"args": [...], "assoc_args": {...}} commands. Prints a JSON list
+ * with the return code, stdout and stderr of each command, in order.
+ */
+
+$ops             = json_decode( file_get_contents( $args[0] ), true );
+$results         = array();
+$previous_logger = WP_CLI::get_logger();
+
+foreach ( $ops as $op ) {
+	$logger = new WP_CLI\Loggers\Execution();
+	WP_CLI::set_logger( $logger );
+	$logger->ob_start();
+
+	// Turn WP_CLI::error()/halt() into exceptions so one failure does not end the batch.
+	WP_CLI::$capture_exit = true;
+	$return_code          = 0;
+	try {
+		WP_CLI::run_command( $op['args'], (array) $op['assoc_args'] );
+	} catch ( WP_CLI\ExitException $e ) {
+		$return_code = $e->getCode();
+	}
+	WP_CLI::$capture_exit = false;
+	$logger->ob_end();
+
+	$results[] = array(
+		'return_code' => $return_code,
+		'stdout'      => trim( $logger->stdout ),
+		'stderr'      => trim( $logger->stderr ),
+	);
+}
+
+WP_CLI::set_logger( $previous_logger );
+echo json_encode( $results );
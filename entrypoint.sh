@@ -83,13 +83,11 @@ start_agent() {
         python -m flask run --host=0.0.0.0 --port=5000 --reload &
     else
         echo "Starting agent in production mode..."
-        gunicorn --bind 0.0.0.0:5000 \
-                 --workers 4 \
+        gunicorn --config "${WP_PATH}/config/gunicorn.conf.py" \
                  --access-logfile "${LOG_DIR}/access.log" \
                  --error-logfile "${LOG_DIR}/error.log" \
                  --capture-output \
-                 --log-level "${LOG_LEVEL}" \
-                 agent:app &
+                 app:app &
     fi
     
     AGENT_PID=$!
@@ -1,13 +1,21 @@
 import pytest
 import os
 import sys
+import tempfile
 
 # Add project root to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# agent.app reads its configuration at import time
+os.environ.setdefault('AGENT_API_KEY', 'test-key')
+os.environ.setdefault('REDIS_URL', 'memory://')
+# Keep generated flask.key/jwt.key out of the real /app/secrets
+if 'SECRETS_DIR' not in os.environ:
+    os.environ['SECRETS_DIR'] = tempfile.mkdtemp(prefix='wp-agent-secrets-')
+
 @pytest.fixture
 def app():
-    from agent import app
+    from agent.app import app
     app.config['TESTING'] = True
     return app
 
@@ -15,7 +23,53 @@ def app():
 def client(app):
     return app.test_client()
 
+@pytest.fixture
+def api_headers():
+    return {'X-API-KEY': 'test-key'}
+
+@pytest.fixture
+def post_tool(client, api_headers):
+    """Post a single tool call to /a2a/task"""
+    def post(tool, args=None):
+        return client.post('/a2a/task', headers=api_headers, json={'tool': tool, 'args': args or {}})
+    return post
+
+@pytest.fixture
+def post_batch(client, api_headers):
+    """Post a batch of tool calls to /a2a/task"""
+    def post(batch):
+        return client.post('/a2a/task', headers=api_headers, json={'batch': batch})
+    return post
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Keep cached tool results from leaking between tests"""
+    from agent import app as agent_app
+    agent_app.response_cache.clear()
+    agent_app.memory_cache.clear()
+    agent_app._TOOL_CACHE.clear()
+    agent_app._JWT_CACHE.clear()
+    yield
+
+@pytest.fixture
+def safe_base(tmp_path, monkeypatch):
+    """Use a temporary directory as SAFE_BASE_PATH"""
+    from agent import app as agent_app
+    base = os.path.realpath(tmp_path / 'wordpress')
+    os.makedirs(base)
+    monkeypatch.setattr(agent_app.Config, 'SAFE_BASE_PATH', base)
+    monkeypatch.setattr(agent_app, '_SAFE_BASE_PREFIX', base + os.sep)
+    return base
+
+@pytest.fixture
+def backup_dir(tmp_path, monkeypatch):
+    """Write backups to a temporary directory"""
+    from agent import app as agent_app
+    path = str(tmp_path / 'backups')
+    monkeypatch.setattr(agent_app.Config, 'BACKUP_DIR', path)
+    return path
+
 @pytest.fixture
 def mock_wp_cli(mocker):
     """Mock WP-CLI commands"""
-    return mocker.patch('agent.run_wp_cli_command')
\ No newline at end of file
+    return mocker.patch('agent.app.run_wp_cli_command')
@@ -0,0 +1,47 @@
+import time
+
+import jwt
+import pytest
+
+from agent import app as agent_app
+
+def make_token(**claims):
+    return jwt.encode({'sub': 'agent', **claims}, agent_app.Config.JWT_SECRET_KEY, algorithm='HS256')
+
+def test_repeated_token_is_served_from_cache(mocker):
+    """Test a verified token is decoded once and then reused"""
+    decode = mocker.spy(agent_app.jwt, 'decode')
+    token = make_token(exp=int(time.time()) + 3600)
+
+    first = agent_app.decode_token(token)
+    second = agent_app.decode_token(token)
+
+    assert first == second
+    assert first['sub'] == 'agent'
+    assert decode.call_count == 1
+
+def test_expired_cached_token_is_rejected():
+    """Test a cached token whose exp has passed is verified again and rejected"""
+    token = make_token(exp=int(time.time()) - 10)
+    # Cached while it was still valid
+    agent_app._JWT_CACHE[token] = {'sub': 'agent', 'exp': int(time.time()) - 10}
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        agent_app.decode_token(token)
+    assert token not in agent_app._JWT_CACHE
+
+def test_tampered_token_never_hits_cache(mocker):
+    """Test a token with a changed signature or payload is verified, not served from cache"""
+    token = make_token(exp=int(time.time()) + 3600)
+    agent_app.decode_token(token)
+    decode = mocker.spy(agent_app.jwt, 'decode')
+
+    header, payload, signature = token.split('.')
+    forged_signature = ('A' if signature[0] != 'A' else 'B') + signature[1:]
+    forged_payload = jwt.utils.base64url_encode(b'{"sub":"admin","exp":9999999999}').decode()
+    for tampered in (f'{header}.{payload}.{forged_signature}', f'{header}.{forged_payload}.{signature}'):
+        with pytest.raises(jwt.InvalidSignatureError):
+            agent_app.decode_token(tampered)
+        assert tampered not in agent_app._JWT_CACHE
+
+    assert decode.call_count == 2
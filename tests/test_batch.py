@@ -0,0 +1,144 @@
+import pytest
+
+def output(stdout='', return_code=0, stderr=''):
+    return {'return_code': return_code, 'stdout': stdout, 'stderr': stderr}
+
+def test_batch_results_follow_request_order(post_batch, mocker):
+    """Test results line up with the calls, across WP-CLI groups and in-process tools"""
+    mock_batch = mocker.patch('agent.app.run_wp_cli_batch', side_effect=[
+        [output('"My Site"'), output('Success: Updated')],
+        [output('[{"name": "astra"}]')],
+    ])
+    mock_wp_cli = mocker.patch('agent.app.run_wp_cli_command', return_value={'php_version': '8.2'})
+
+    response = post_batch([
+        {'tool': 'get_wordpress_option', 'args': {'option_name': 'blogname'}},
+        {'tool': 'update_wordpress_option', 'args': {'option_name': 'blogname', 'option_value': 'New'}},
+        {'tool': 'get_system_information'},
+        {'tool': 'get_active_wordpress_theme'},
+    ])
+
+    assert response.status_code == 200
+    results = response.json['results']
+    assert results[0] == {'status': 'success', 'option_name': 'blogname', 'value': 'My Site'}
+    assert results[1] == {'status': 'success', 'message': 'Success: Updated'}
+    assert results[2]['data']['wordpress'] == {'php_version': '8.2'}
+    assert results[3] == {'status': 'success', 'data': {'name': 'astra'}}
+    assert mock_batch.call_args_list[0].args[0] == [
+        ['option', 'get', 'blogname', '--format=json'],
+        ['option', 'update', 'blogname', 'New'],
+    ]
+    mock_wp_cli.assert_called_once()
+
+def test_batch_reports_failed_commands(post_batch, mocker):
+    """Test per-command failures, invalid calls and missing outputs become error results"""
+    mocker.patch('agent.app.run_wp_cli_batch', return_value=[
+        output(return_code=1, stderr='Error: Plugin not found.'),
+    ])
+
+    response = post_batch([
+        {'tool': 'activate_wordpress_plugin', 'args': {'plugin_slug': 'missing'}},
+        {'tool': 'activate_wordpress_plugin', 'args': {}},
+        {'tool': 'no_such_tool'},
+        {'tool': 'deactivate_wordpress_plugin', 'args': {'plugin_slug': 'akismet'}},
+    ])
+
+    assert response.status_code == 200
+    results = response.json['results']
+    assert results[0] == {'status': 'error', 'message': 'WP-CLI Error: Error: Plugin not found.'}
+    assert results[1] == {'status': 'error', 'message': 'Missing required field: plugin_slug'}
+    assert results[2] == {'status': 'error', 'message': 'Unknown tool: no_such_tool'}
+    assert results[3] == {'status': 'error', 'message': 'No result from WP-CLI batch'}
+
+def test_batch_run_failure_fails_the_group(post_batch, mocker):
+    """Test an exception from the batch run is reported for every call in the group"""
+    mocker.patch('agent.app.run_wp_cli_batch', side_effect=Exception('Command timeout'))
+
+    response = post_batch([
+        {'tool': 'get_wordpress_plugins'},
+        {'tool': 'get_wordpress_option', 'args': {'option_name': 'home'}},
+    ])
+
+    assert response.status_code == 200
+    assert response.json['results'] == [
+        {'status': 'error', 'message': 'Command timeout'},
+        {'status': 'error', 'message': 'Command timeout'},
+    ]
+
+@pytest.mark.parametrize('batch', [[], {'tool': 'get_wordpress_plugins'}])
+def test_batch_must_be_non_empty_list(post_batch, batch):
+    """Test malformed batches are rejected"""
+    assert post_batch(batch).status_code == 400
+
+def test_batch_size_is_limited(post_batch, mocker):
+    """Test batches above MAX_BATCH_SIZE are rejected before anything runs"""
+    from agent.app import Config
+    mock_batch = mocker.patch('agent.app.run_wp_cli_batch')
+
+    response = post_batch([{'tool': 'get_wordpress_plugins'}] * (Config.MAX_BATCH_SIZE + 1))
+
+    assert response.status_code == 400
+    mock_batch.assert_not_called()
+
+def test_batch_invalidates_reads_made_during_the_run(post_batch, post_tool, mocker):
+    """Test a read cached while the batch runs is dropped once the writes are done"""
+    from agent import app as agent_app
+    state = {'blogname': 'old'}
+    mocker.patch('agent.app.run_wp_cli_command', side_effect=lambda *args, **kwargs: state['blogname'])
+
+    def run_batch(commands):
+        # Another request reads the option while WordPress is still running the batch
+        read, _ = agent_app.call_tool(
+            'get_wordpress_option', agent_app.TOOLS['get_wordpress_option'], {'args': {'option_name': 'blogname'}}
+        )
+        assert read['value'] == 'old'
+        state['blogname'] = 'new'
+        return [output('Success: Updated')]
+    mocker.patch('agent.app.run_wp_cli_batch', side_effect=run_batch)
+
+    post_batch([
+        {'tool': 'update_wordpress_option', 'args': {'option_name': 'blogname', 'option_value': 'new'}},
+    ])
+
+    response = post_tool('get_wordpress_option', {'option_name': 'blogname'})
+    assert response.json['value'] == 'new'
+
+def test_batch_invalidates_reads_when_the_run_fails(post_batch, post_tool, mocker):
+    """Test invalidation still happens when the batch fails part way through"""
+    from agent import app as agent_app
+    state = {'blogname': 'old'}
+    mocker.patch('agent.app.run_wp_cli_command', side_effect=lambda *args, **kwargs: state['blogname'])
+
+    def run_batch(commands):
+        agent_app.call_tool(
+            'get_wordpress_option', agent_app.TOOLS['get_wordpress_option'], {'args': {'option_name': 'blogname'}}
+        )
+        state['blogname'] = 'new'
+        raise Exception('Command timeout')
+    mocker.patch('agent.app.run_wp_cli_batch', side_effect=run_batch)
+
+    post_batch([
+        {'tool': 'update_wordpress_option', 'args': {'option_name': 'blogname', 'option_value': 'new'}},
+    ])
+
+    response = post_tool('get_wordpress_option', {'option_name': 'blogname'})
+    assert response.json['value'] == 'new'
+
+def test_batch_invalidates_wp_cli_results_cached_during_the_run(post_batch, mocker):
+    """Test an `option get` cached in the WP-CLI result cache during the batch is dropped"""
+    from agent import app as agent_app
+    state = {'blogname': b'"old"'}
+    mocker.patch.object(agent_app, 'wp_cli_circuit_breaker', agent_app.CircuitBreaker())
+    mocker.patch('agent.app._execute_wp_cli', side_effect=lambda command, timeout: state['blogname'])
+
+    def run_batch(commands):
+        assert agent_app.run_wp_cli_command(['option', 'get', 'blogname', '--format=json'], decode_json=True) == 'old'
+        state['blogname'] = b'"new"'
+        return [output('Success: Updated')]
+    mocker.patch('agent.app.run_wp_cli_batch', side_effect=run_batch)
+
+    post_batch([
+        {'tool': 'update_wordpress_option', 'args': {'option_name': 'blogname', 'option_value': 'new'}},
+    ])
+
+    assert agent_app.run_wp_cli_command(['option', 'get', 'blogname', '--format=json'], decode_json=True) == 'new'
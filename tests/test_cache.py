@@ -0,0 +1,62 @@
+from unittest.mock import Mock
+
+from agent import app as agent_app
+
+def test_cached_call_reuses_result_until_invalidated():
+    """Test tool lookups are cached and dropped by invalidate_tool_cache"""
+    func = Mock(side_effect=['first', 'second', 'third'])
+
+    assert agent_app.cached_call('theme:list', 60, func) == 'first'
+    assert agent_app.cached_call('theme:list', 60, func) == 'first'
+
+    agent_app.invalidate_tool_cache('theme')
+    assert agent_app.cached_call('theme:list', 60, func) == 'second'
+
+    agent_app.invalidate_tool_cache('plugin')
+    assert agent_app.cached_call('theme:list', 60, func) == 'second'
+    assert agent_app.cached_call('theme:list', 60, func, refresh=True) == 'third'
+
+def test_cached_call_sees_invalidation_from_other_processes():
+    """Test an entry is stale once its generation moves, even while still held locally"""
+    func = Mock(side_effect=['first', 'second'])
+    agent_app.cached_call('theme:active', 60, func)
+
+    # Another worker only bumps the shared generation; this worker's entry stays in memory
+    agent_app.bump_cache_generations(['tool:theme'])
+
+    assert 'theme:active' in agent_app._TOOL_CACHE
+    assert agent_app.cached_call('theme:active', 60, func) == 'second'
+
+def test_response_cache_is_invalidated_by_writes(post_tool, mock_wp_cli):
+    """Test a cached read is served until a mutating tool invalidates it"""
+    mock_wp_cli.side_effect = ['Old', 'Old', 'Success: Updated', 'New']
+
+    assert post_tool('get_wordpress_option', {'option_name': 'blogname'}).json['value'] == 'Old'
+    assert post_tool('get_wordpress_option', {'option_name': 'blogname'}).json['value'] == 'Old'
+    assert mock_wp_cli.call_count == 1
+
+    post_tool('get_wordpress_option', {'option_name': 'home'})
+    post_tool('update_wordpress_option', {'option_name': 'blogname', 'option_value': 'New'})
+
+    assert post_tool('get_wordpress_option', {'option_name': 'blogname'}).json['value'] == 'New'
+    assert mock_wp_cli.call_count == 4
+
+def test_response_cache_sees_invalidation_from_other_processes(post_tool, mock_wp_cli):
+    """Test a cached response is not served after another worker's write"""
+    mock_wp_cli.side_effect = ['Old', 'New']
+    post_tool('get_wordpress_option', {'option_name': 'blogname'})
+
+    agent_app.bump_cache_generations(['response:get_wordpress_option'])
+
+    assert post_tool('get_wordpress_option', {'option_name': 'blogname'}).json['value'] == 'New'
+
+def test_read_file_cache_key_includes_stream(post_tool, safe_base, monkeypatch):
+    """Test streamed and plain reads of a file are cached separately"""
+    monkeypatch.setattr(agent_app.Config, 'READ_STREAM_THRESHOLD', 4)
+    with open(f'{safe_base}/notes.txt', 'w') as f:
+        f.write('hello world')
+
+    post_tool('read_file', {'file_path': 'notes.txt', 'stream': False})
+    streamed = post_tool('read_file', {'file_path': 'notes.txt'})
+
+    assert streamed.json['encoding'] == 'base64'
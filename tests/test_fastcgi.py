@@ -0,0 +1,238 @@
+import socket
+import struct
+import subprocess
+import threading
+
+import pytest
+
+from agent.app import (
+    FCGI_BEGIN_REQUEST,
+    FCGI_END_REQUEST,
+    FCGI_HEADER,
+    FCGI_MAX_CONTENT,
+    FCGI_PARAMS,
+    FCGI_STDERR,
+    FCGI_STDOUT,
+    FastCGIClient,
+    StaleConnectionError,
+    _fcgi_pair,
+    _fcgi_record,
+    _fcgi_stream,
+)
+
+def make_record(record_type, content=b'', padding=0):
+    """Build a record the way php-fpm may send it, with optional padding"""
+    return FCGI_HEADER.pack(1, record_type, 1, len(content), padding) + content + b'\0' * padding
+
+def end_request():
+    return make_record(FCGI_END_REQUEST, struct.pack('!IB3x', 0, 0))
+
+def parse_records(data):
+    records = []
+    while data:
+        _, record_type, request_id, length, padding = FCGI_HEADER.unpack(data[:FCGI_HEADER.size])
+        start = FCGI_HEADER.size
+        records.append((record_type, request_id, data[start:start + length]))
+        data = data[start + length + padding:]
+    return records
+
+def ok_response(body=b'ok'):
+    return make_record(FCGI_STDOUT, b'Status: 200\r\n\r\n' + body) + end_request()
+
+def fcgi_server(response):
+    """Return (server, client) socket ends with response already queued for the client"""
+    server, client = socket.socketpair()
+    if response is not None:
+        server.sendall(response)
+    return server, client
+
+def response_from(data):
+    """Read a response with FastCGIClient from a socket fed with data"""
+    server, client = socket.socketpair()
+    try:
+        server.sendall(data)
+        server.close()
+        return FastCGIClient('/nonexistent', '/boot.php')._read_response(client)
+    finally:
+        client.close()
+
+def test_record_header():
+    """Test record encoding"""
+    record = _fcgi_record(FCGI_BEGIN_REQUEST, b'abc')
+    assert record == b'\x01\x01\x00\x01\x00\x03\x00\x00abc'
+
+def test_stream_splits_and_terminates():
+    """Test long streams are split into records and end with an empty one"""
+    content = b'x' * (FCGI_MAX_CONTENT + 10)
+    records = parse_records(_fcgi_stream(FCGI_PARAMS, content))
+    assert [len(body) for _, _, body in records] == [FCGI_MAX_CONTENT, 10, 0]
+    assert all(record_type == FCGI_PARAMS and request_id == 1 for record_type, request_id, _ in records)
+    assert b''.join(body for _, _, body in records) == content
+
+def test_pair_length_encoding():
+    """Test short lengths take one byte and long lengths four"""
+    assert _fcgi_pair('A', 'bc') == b'\x01\x02Abc'
+    long_value = 'v' * 200
+    encoded = _fcgi_pair('NAME', long_value)
+    assert encoded[:1] == b'\x04'
+    assert struct.unpack('!I', encoded[1:5])[0] == 200 | 0x80000000
+    assert encoded[5:] == b'NAME' + long_value.encode()
+
+def test_read_response_skips_padding():
+    """Test padding bytes are dropped from record content"""
+    stdout, stderr = response_from(
+        make_record(FCGI_STDOUT, b'hello', padding=3)
+        + make_record(FCGI_STDERR, b'warn', padding=4)
+        + end_request()
+    )
+    assert stdout == b'hello'
+    assert stderr == b'warn'
+
+def test_read_response_joins_stdout_records():
+    """Test stdout spread over several records is concatenated"""
+    stdout, stderr = response_from(
+        make_record(FCGI_STDOUT, b'Status: 200\r\n\r\n')
+        + make_record(FCGI_STDOUT, b'{"a":', padding=3)
+        + make_record(FCGI_STDOUT, b'1}')
+        + make_record(FCGI_STDOUT)
+        + end_request()
+    )
+    assert stdout == b'Status: 200\r\n\r\n{"a":1}'
+    assert stderr == b''
+
+def test_run_maps_error_status(tmp_path, mocker):
+    """Test a 5xx Status header raises like a failed subprocess"""
+    client = FastCGIClient(str(tmp_path / 'fpm.sock'), '/boot.php')
+    server, client_sock = socket.socketpair()
+    server.sendall(
+        make_record(FCGI_STDOUT, b'Status: 500\r\nX-WP-CLI-Stderr: Error%3A%20boom\r\n\r\n')
+        + end_request()
+    )
+    mocker.patch.object(client, '_connect', return_value=client_sock)
+    try:
+        with pytest.raises(subprocess.CalledProcessError) as excinfo:
+            client.run(('wp', 'option', 'get', 'home'))
+    finally:
+        server.close()
+    assert excinfo.value.stderr == b'Error: boom'
+
+def test_closed_pooled_connection_is_discarded_before_sending(mocker):
+    """Test a pooled connection closed by php-fpm while idle is replaced before use"""
+    client = FastCGIClient('/nonexistent', '/boot.php')
+    stale_server, stale = fcgi_server(None)
+    stale_server.close()
+    client._release(stale)
+    fresh_server, fresh = fcgi_server(ok_response())
+    connect = mocker.patch.object(client, '_connect', return_value=fresh)
+
+    try:
+        assert client.run(('wp', 'option', 'get', 'home')) == b'ok'
+    finally:
+        fresh_server.close()
+    connect.assert_called_once()
+    assert stale.fileno() == -1
+
+def test_readable_pooled_connection_is_discarded(mocker):
+    """Test a pooled connection with unexpected pending data is not reused"""
+    client = FastCGIClient('/nonexistent', '/boot.php')
+    stray_server, stray = fcgi_server(end_request())
+    client._release(stray)
+    fresh_server, fresh = fcgi_server(ok_response())
+    mocker.patch.object(client, '_connect', return_value=fresh)
+
+    try:
+        assert client.run(('wp', 'option', 'get', 'home')) == b'ok'
+    finally:
+        stray_server.close()
+        fresh_server.close()
+    assert stray.fileno() == -1
+
+def test_pooled_connection_is_reused(mocker):
+    """Test a healthy pooled connection is used without connecting again"""
+    client = FastCGIClient('/nonexistent', '/boot.php')
+    server, pooled = fcgi_server(None)
+    client._release(pooled)
+    server.sendall(ok_response())
+    # The response is only queued once the request would have been sent
+    mocker.patch.object(client, '_is_idle', return_value=True)
+    connect = mocker.patch.object(client, '_connect')
+
+    try:
+        assert client.run(('wp', 'option', 'get', 'home')) == b'ok'
+    finally:
+        server.close()
+    connect.assert_not_called()
+
+def test_failed_send_on_pooled_connection_is_resent(mocker):
+    """Test a request that could not be sent is sent again on a fresh connection"""
+    client = FastCGIClient('/nonexistent', '/boot.php')
+    stale = mocker.Mock(spec=socket.socket)
+    stale.sendall.side_effect = BrokenPipeError()
+    client._release(stale)
+    mocker.patch.object(client, '_is_idle', return_value=True)
+    fresh_server, fresh = fcgi_server(ok_response())
+    mocker.patch.object(client, '_connect', return_value=fresh)
+
+    try:
+        assert client.run(('wp', 'option', 'get', 'home')) == b'ok'
+    finally:
+        fresh_server.close()
+    stale.close.assert_called_once()
+
+def test_connection_closed_after_send_is_not_resent(mocker):
+    """Test a pool worker dying after reading the request fails the call instead of rerunning it"""
+    client = FastCGIClient('/nonexistent', '/boot.php')
+    server, pooled = fcgi_server(None)
+    client._release(pooled)
+    connect = mocker.patch.object(client, '_connect')
+
+    def worker():
+        # Reads the whole request, then dies before writing any output
+        server.recv(65536)
+        server.close()
+    thread = threading.Thread(target=worker)
+    thread.start()
+    try:
+        with pytest.raises(ConnectionError):
+            client.run(('wp', 'post', 'create', '--post_title=x'))
+    finally:
+        thread.join(5)
+    connect.assert_not_called()
+
+def test_failed_send_on_fresh_connection_is_not_resent(mocker):
+    """Test a new connection failing during the send is not retried"""
+    client = FastCGIClient('/nonexistent', '/boot.php')
+    server, fresh = fcgi_server(None)
+    server.close()
+    connect = mocker.patch.object(client, '_connect', return_value=fresh)
+
+    with pytest.raises(StaleConnectionError):
+        client.run(('wp', 'option', 'get', 'home'))
+    connect.assert_called_once()
+
+def test_partial_response_is_not_resent(mocker):
+    """Test a connection lost mid-response fails without sending the command again"""
+    client = FastCGIClient('/nonexistent', '/boot.php')
+    server, pooled = fcgi_server(None)
+    client._release(pooled)
+    mocker.patch.object(client, '_is_idle', return_value=True)
+    server.sendall(make_record(FCGI_STDOUT, b'Status: 200\r\n'))
+    server.shutdown(socket.SHUT_WR)
+    connect = mocker.patch.object(client, '_connect')
+
+    try:
+        with pytest.raises(ConnectionError):
+            client.run(('wp', 'option', 'get', 'home'))
+    finally:
+        server.close()
+    connect.assert_not_called()
+
+def test_runner_errors_are_translated(mocker):
+    """Test socket and missing-binary errors reach callers as WP-CLI errors"""
+    from agent import app as agent_app
+    mocker.patch.object(agent_app, 'wp_cli_circuit_breaker', agent_app.CircuitBreaker())
+    mocker.patch.object(agent_app, '_execute_wp_cli', side_effect=ConnectionResetError('reset'))
+
+    with pytest.raises(Exception, match='WP-CLI runner error: reset') as excinfo:
+        agent_app.run_wp_cli_command(['plugin', 'activate', 'akismet'])
+    assert not isinstance(excinfo.value, OSError)
@@ -0,0 +1,95 @@
+import hashlib
+import os
+
+def test_read_file_streams_large_files(post_tool, safe_base, monkeypatch):
+    """Test files above the threshold are streamed unless args.stream is false"""
+    from agent.app import Config
+    monkeypatch.setattr(Config, 'READ_STREAM_THRESHOLD', 4)
+    with open(os.path.join(safe_base, 'notes.txt'), 'w') as f:
+        f.write('hello world')
+
+    streamed = post_tool('read_file', {'file_path': 'notes.txt'})
+    assert streamed.status_code == 200
+    assert streamed.json['encoding'] == 'base64'
+    assert streamed.json['content'] == 'aGVsbG8gd29ybGQ='
+
+    plain = post_tool('read_file', {'file_path': 'notes.txt', 'stream': False})
+    assert plain.status_code == 200
+    assert 'encoding' not in plain.json
+    assert plain.json['content'] == 'hello world'
+
+def test_read_file_rejects_non_bool_stream(post_tool, safe_base):
+    """Test the stream flag is type checked"""
+    response = post_tool('read_file', {'file_path': 'notes.txt', 'stream': 'no'})
+    assert response.status_code == 400
+
+def test_read_file_errors(post_tool, safe_base, monkeypatch):
+    """Test missing files return 404 and unreadable targets 400"""
+    from agent.app import Config
+    os.makedirs(os.path.join(safe_base, 'wp-content'))
+    with open(os.path.join(safe_base, 'big.txt'), 'w') as f:
+        f.write('x' * 20)
+    monkeypatch.setattr(Config, 'MAX_FILE_SIZE', 10)
+
+    missing = post_tool('read_file', {'file_path': 'missing.txt'})
+    assert missing.status_code == 404
+    assert missing.json == {'status': 'error', 'message': 'File not found: missing.txt'}
+    assert post_tool('read_file', {'file_path': 'wp-content'}).status_code == 400
+    assert post_tool('read_file', {'file_path': 'big.txt'}).status_code == 400
+
+def test_edit_file_rejects_large_content(post_tool, safe_base, monkeypatch):
+    """Test content above MAX_FILE_SIZE is rejected without writing"""
+    from agent.app import Config
+    monkeypatch.setattr(Config, 'MAX_FILE_SIZE', 10)
+
+    response = post_tool('edit_file', {'file_path': 'notes.txt', 'content': 'x' * 20})
+    assert response.status_code == 400
+    assert response.json['message'] == 'Content too large'
+    assert not os.path.exists(os.path.join(safe_base, 'notes.txt'))
+
+def test_edit_file_replaces_content_and_keeps_backup(post_tool, safe_base, backup_dir):
+    """Test an edit writes the new content, reports size and hash and backs up the old file"""
+    target = os.path.join(safe_base, 'style.css')
+    with open(target, 'w') as f:
+        f.write('old')
+    content = 'body { color: #333; } /* é */'
+
+    response = post_tool('edit_file', {'file_path': 'style.css', 'content': content})
+
+    assert response.status_code == 200
+    assert response.json['size'] == len(content.encode('utf-8'))
+    assert response.json['hash'] == hashlib.sha256(content.encode('utf-8')).hexdigest()
+    with open(target, encoding='utf-8') as f:
+        assert f.read() == content
+    with open(response.json['backup_path']) as f:
+        assert f.read() == 'old'
+    assert os.path.dirname(response.json['backup_path']) == backup_dir
+    assert os.listdir(safe_base) == ['style.css']
+
+def test_edit_file_removes_temp_file_on_failure(post_tool, safe_base, backup_dir, mocker):
+    """Test a failed replace leaves the original file and no .tmp file behind"""
+    target = os.path.join(safe_base, 'style.css')
+    with open(target, 'w') as f:
+        f.write('old')
+    mocker.patch('agent.app.os.replace', side_effect=OSError('disk full'))
+
+    response = post_tool('edit_file', {'file_path': 'style.css', 'content': 'new'})
+
+    assert response.status_code == 500
+    assert os.listdir(safe_base) == ['style.css']
+    with open(target) as f:
+        assert f.read() == 'old'
+
+def test_append_to_file_keeps_existing_content_and_backup(post_tool, safe_base, backup_dir):
+    """Test appending adds to the end of an existing file and backs up the original"""
+    target = os.path.join(safe_base, 'debug.txt')
+    with open(target, 'w') as f:
+        f.write('first\n')
+
+    response = post_tool('append_to_file', {'file_path': 'debug.txt', 'content': 'second\n'})
+
+    assert response.status_code == 200
+    with open(target) as f:
+        assert f.read() == 'first\nsecond\n'
+    with open(response.json['backup_path']) as f:
+        assert f.read() == 'first\n'
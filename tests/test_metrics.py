@@ -0,0 +1,63 @@
+import threading
+
+from agent import app as agent_app
+
+def test_metrics_output_is_reused_within_ttl(client, mocker, monkeypatch):
+    """Test scrapes within METRICS_CACHE_TTL reuse the rendered body without touching Redis"""
+    monkeypatch.setattr(agent_app, '_metrics_body', None)
+    render = mocker.patch.object(agent_app, 'generate_latest', side_effect=[b'first 1\n', b'second 1\n'])
+    generation = mocker.patch.object(agent_app, 'cache_generation')
+
+    assert client.get('/metrics').data == b'first 1\n'
+    assert client.get('/metrics').data == b'first 1\n'
+    assert render.call_count == 1
+
+    monkeypatch.setattr(agent_app.Config, 'METRICS_CACHE_TTL', 0)
+    assert client.get('/metrics').data == b'second 1\n'
+    generation.assert_not_called()
+
+def test_buffered_metrics_flush_into_collectors(mocker):
+    """Test buffered counts, durations and active requests reach the collectors"""
+    request_count = mocker.patch.object(agent_app, 'REQUEST_COUNT')
+    request_duration = mocker.patch.object(agent_app, 'REQUEST_DURATION')
+    active_connections = mocker.patch.object(agent_app, 'ACTIVE_CONNECTIONS')
+    metrics = agent_app.BufferedMetrics()
+
+    def worker():
+        for duration in (0.25, 0.5):
+            metrics.request_started()
+            metrics.request_finished('POST', 'handle_a2a_task', 200, duration)
+        metrics.request_started()  # still in flight at flush time
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    metrics.request_started()
+    metrics.request_finished('GET', 'health_check', 200, 0.125)
+    metrics.flush()
+
+    request_count.labels.assert_any_call(method='POST', endpoint='handle_a2a_task', status=200)
+    request_count.labels.assert_any_call(method='GET', endpoint='health_check', status=200)
+    request_count.labels.return_value.inc.assert_has_calls([mocker.call(2), mocker.call(1)], any_order=True)
+    assert sorted(call.args[0] for call in request_duration.observe.call_args_list) == [0.125, 0.25, 0.5]
+    active_connections.inc.assert_called_once_with(1)
+
+def test_buffered_metrics_prune_dead_threads(mocker):
+    """Test a finished thread's buffer is drained once and then dropped"""
+    mocker.patch.object(agent_app, 'REQUEST_COUNT')
+    request_duration = mocker.patch.object(agent_app, 'REQUEST_DURATION')
+    mocker.patch.object(agent_app, 'ACTIVE_CONNECTIONS')
+    metrics = agent_app.BufferedMetrics()
+
+    thread = threading.Thread(target=lambda: metrics.request_finished('GET', 'health_check', 200, 0.5))
+    thread.start()
+    thread.join()
+    metrics.request_finished('GET', 'health_check', 200, 0.25)
+    assert len(metrics._buffers) == 2
+
+    metrics.flush()
+    assert [buffer.thread for buffer in metrics._buffers] == [threading.current_thread()]
+    assert request_duration.observe.call_count == 2
+
+    metrics.flush()
+    assert request_duration.observe.call_count == 2
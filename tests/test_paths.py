@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from agent.app import validate_file_path
+
+def test_relative_and_absolute_paths_stay_in_base(safe_base):
+    """Test paths are resolved inside SAFE_BASE_PATH"""
+    assert validate_file_path('wp-content/style.css') == os.path.join(safe_base, 'wp-content', 'style.css')
+    assert validate_file_path('/wp-config.php') == os.path.join(safe_base, 'wp-config.php')
+
+@pytest.mark.parametrize('path', [
+    '../secret.txt',
+    'wp-content/../../secret.txt',
+    '/../secret.txt',
+])
+def test_traversal_is_rejected(safe_base, path):
+    """Test paths escaping SAFE_BASE_PATH are rejected"""
+    with pytest.raises(PermissionError):
+        validate_file_path(path)
+
+def test_sibling_directory_with_same_prefix_is_rejected(safe_base):
+    """Test '/base_evil' does not pass as inside '/base'"""
+    os.makedirs(safe_base + '_evil')
+    with pytest.raises(PermissionError):
+        validate_file_path(f'../{os.path.basename(safe_base)}_evil/index.php')
+
+def test_symlink_out_of_base_is_rejected(safe_base, tmp_path):
+    """Test symlinks are resolved before the containment check"""
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    (outside / 'secret.txt').write_text('secret')
+    os.symlink(outside, os.path.join(safe_base, 'link'))
+    with pytest.raises(PermissionError):
+        validate_file_path('link/secret.txt')
+
+@pytest.mark.parametrize('path', ['shell.phar', 'x.PHTML', 'wp-content/evil.sh'])
+def test_disallowed_extension_is_rejected(safe_base, path):
+    """Test files outside the extension whitelist are rejected"""
+    with pytest.raises(PermissionError):
+        validate_file_path(path)
+
+@pytest.mark.parametrize('path', ['x.php5/', 'x.phar/.', 'x.sh//', 'evil.sh/', 'x.phtml/.'])
+def test_trailing_separators_do_not_hide_extension(safe_base, path):
+    """Test the extension is taken from the normalized file name"""
+    with pytest.raises(PermissionError):
+        validate_file_path(path)
+
+@pytest.mark.parametrize('path', ['index.php', 'style.CSS', '.htaccess', 'README'])
+def test_allowed_names_pass(safe_base, path):
+    """Test whitelisted extensions, dotfiles and names without extension are accepted"""
+    assert validate_file_path(path) == os.path.join(safe_base, path)
+
+def test_symlink_to_disallowed_extension_is_rejected(safe_base):
+    """Test the extension of the file a symlink resolves to is checked too"""
+    os.symlink(os.path.join(safe_base, 'shell.phar'), os.path.join(safe_base, 'notes.txt'))
+    with pytest.raises(PermissionError):
+        validate_file_path('notes.txt')
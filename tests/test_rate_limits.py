@@ -0,0 +1,41 @@
+import pytest
+
+from limits import parse as parse_rate_limit
+
+@pytest.fixture
+def one_install_per_minute(monkeypatch):
+    """Allow a single install_wordpress_plugin call per client"""
+    from agent import app as agent_app
+    monkeypatch.setitem(agent_app._TOOL_RATE_LIMIT_ITEMS, 'install_wordpress_plugin', parse_rate_limit('1/minute'))
+    agent_app.limiter.reset()
+    yield
+    agent_app.limiter.reset()
+
+def test_tool_rate_limit_returns_429(post_tool, mock_wp_cli, one_install_per_minute):
+    """Test a tool over its own limit is rejected before WP-CLI runs"""
+    mock_wp_cli.return_value = 'Success: Installed 1 of 1 plugins.'
+
+    first = post_tool('install_wordpress_plugin', {'plugin_slug': 'akismet'})
+    second = post_tool('install_wordpress_plugin', {'plugin_slug': 'akismet'})
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert second.json == {'status': 'error', 'message': 'Rate limit exceeded for tool: install_wordpress_plugin'}
+    mock_wp_cli.assert_called_once()
+
+def test_tool_rate_limit_in_batch(post_batch, mocker, one_install_per_minute):
+    """Test calls over a tool limit become error results while the rest of the batch runs"""
+    mock_batch = mocker.patch('agent.app.run_wp_cli_batch', return_value=[
+        {'return_code': 0, 'stdout': 'Success: Installed 1 of 1 plugins.', 'stderr': ''},
+    ])
+
+    response = post_batch([
+        {'tool': 'install_wordpress_plugin', 'args': {'plugin_slug': 'akismet'}},
+        {'tool': 'install_wordpress_plugin', 'args': {'plugin_slug': 'jetpack'}},
+    ])
+
+    assert response.status_code == 200
+    results = response.json['results']
+    assert results[0]['status'] == 'success'
+    assert results[1] == {'status': 'error', 'message': 'Rate limit exceeded for tool: install_wordpress_plugin'}
+    assert len(mock_batch.call_args.args[0]) == 1
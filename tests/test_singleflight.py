@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from agent.app import SingleFlight
+
+def run_concurrently(flights, key, func, callers=4):
+    """Call flights.do from several threads while the first call is still running"""
+    outcomes = []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            outcome = flights.do(key, func)
+        except Exception as e:
+            outcome = e
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+def test_concurrent_calls_share_one_result():
+    """Test callers arriving during a run get the leader's result"""
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        release.wait(5)
+        return {'plugins': []}
+
+    threads, outcomes = run_concurrently(flights, 'plugin:list', func)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(outcomes) == 4
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+
+def test_concurrent_calls_share_one_exception():
+    """Test callers arriving during a failing run all get its exception"""
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError('WP-CLI Error: boom')
+
+    threads, outcomes = run_concurrently(flights, 'plugin:list', func)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(outcomes) == 4
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+def test_finished_flight_is_not_reused():
+    """Test a call after the previous one finished runs again"""
+    flights = SingleFlight()
+    results = iter(['first', 'second'])
+
+    assert flights.do('key', lambda: next(results)) == 'first'
+    assert flights.do('key', lambda: next(results)) == 'second'
+    with pytest.raises(ValueError):
+        flights.do('key', lambda: int('x'))
+    assert flights.do('key', lambda: 'third') == 'third'
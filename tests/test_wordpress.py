@@ -3,7 +3,7 @@ from unittest.mock import patch
 
 def test_create_wordpress_post(client, mocker):
     """Test creating a WordPress post"""
-    mock_wp_cli = mocker.patch('agent.run_wp_cli_command')
+    mock_wp_cli = mocker.patch('agent.app.run_wp_cli_command')
     mock_wp_cli.return_value = "123"  # Mocked post ID
 
     response = client.post('/a2a/task',
@@ -23,8 +23,8 @@ def test_create_wordpress_post(client, mocker):
 
 def test_get_system_information(client, mocker):
     """Test getting system information"""
-    mock_wp_cli = mocker.patch('agent.run_wp_cli_command')
-    mock_wp_cli.return_value = '{"php_version": "8.2"}'
+    mock_wp_cli = mocker.patch('agent.app.run_wp_cli_command')
+    mock_wp_cli.return_value = {"php_version": "8.2"}
 
     response = client.post('/a2a/task',
         headers={'X-API-KEY': 'test-key'},
@@ -33,4 +33,4 @@ def test_get_system_information(client, mocker):
     
     assert response.status_code == 200
     assert response.json['status'] == 'success'
-    assert 'php_version' in response.json['data']
\ No newline at end of file
+    assert 'php_version' in response.json['data']['wordpress']
\ No newline at end of file